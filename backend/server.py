@@ -1,30 +1,672 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from dotenv import load_dotenv
-from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-import logging
-from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
-import uuid
-from datetime import datetime, timedelta
-import jwt
-import bcrypt
-from enum import Enum
-import asyncio
+import time
+# Started before the imports so startup_timings can report their cost;
+# the imports below are therefore marked noqa: E402
+IMPORT_STARTED_AT = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status  # noqa: E402
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+from fastapi.responses import JSONResponse, StreamingResponse  # noqa: E402
+from starlette.datastructures import MutableHeaders  # noqa: E402
+from starlette.middleware.cors import CORSMiddleware  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo import DeleteMany, ReplaceOne, ReturnDocument, UpdateOne  # noqa: E402
+from pymongo.errors import DuplicateKeyError, OperationFailure  # noqa: E402
+from pymongo import monitoring  # noqa: E402
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest  # noqa: E402
+import os  # noqa: E402
+import logging  # noqa: E402
+from pathlib import Path  # noqa: E402
+from pydantic import BaseModel, Field, TypeAdapter  # noqa: E402
+import pydantic_core  # noqa: E402
+from typing import TYPE_CHECKING, List, Optional  # noqa: E402
+import uuid  # noqa: E402
+import base64  # noqa: E402
+import gzip  # noqa: E402
+import hashlib  # noqa: E402
+import json  # noqa: E402
+import math  # noqa: E402
+import re  # noqa: E402
+from datetime import datetime, timedelta, timezone  # noqa: E402
+import jwt  # noqa: E402
+import bcrypt  # noqa: E402
+from enum import Enum  # noqa: E402
+import asyncio  # noqa: E402
+import socket  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+import traceback  # noqa: E402
+from collections import OrderedDict, deque  # noqa: E402
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor  # noqa: E402
+from functools import lru_cache  # noqa: E402
+
+if TYPE_CHECKING:
+    # Imported where used: only the rollup and calibration code needs NumPy,
+    # and importing it here would add to every worker's startup
+    import numpy as np
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics
+# A minimal Prometheus text-format registry. Metrics are updated from the
+# event loop and from driver threads (command/pool listeners), so every
+# metric guards its values with a lock.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames: tuple, labelvalues: tuple, le: Optional[str] = None) -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labelvalues, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labelvalues: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labelvalues: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, labelvalues: tuple = (), amount: float = 1):
+        self.inc(labelvalues, -amount)
+
+    def set(self, value: float, labelvalues: tuple = ()):
+        with self._lock:
+            self._values[labelvalues] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, labelvalues: tuple = ()):
+        with self._lock:
+            data = self._values.get(labelvalues)
+            if data is None:
+                data = self._values[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[0][i] += 1
+                    break
+            data[1] += value
+            data[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labelvalues, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, str(bound))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, '+Inf')} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labelvalues)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labelvalues)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics_registry = MetricsRegistry()
+HTTP_REQUEST_DURATION = metrics_registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+HTTP_REQUESTS = metrics_registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+HTTP_REQUESTS_IN_FLIGHT = metrics_registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"))
+MONGO_COMMAND_DURATION = metrics_registry.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and command", ("collection", "command")))
+MONGO_COMMAND_FAILURES = metrics_registry.register(Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands by collection and command", ("collection", "command")))
+PASSWORD_HASH_DURATION = metrics_registry.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time in the worker pool", ("operation",)))
+PASSWORD_HASH_QUEUE_WAIT = metrics_registry.register(Histogram(
+    "password_hash_queue_wait_seconds", "Time bcrypt jobs waited for a worker slot", ("operation",)))
+LOGIN_THROTTLED = metrics_registry.register(Counter(
+    "login_throttled_total", "Login attempts rejected by the rate limiter", ("scope",)))
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    """Feeds MongoDB command timings into the metrics registry."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def started(self, event):
+        command = event.command
+        collection = command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = command.get("collection")
+        if not isinstance(collection, str):
+            collection = ""
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, event.command_name)
+
+    def _finish(self, event):
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), ("", event.command_name))
+
+    def succeeded(self, event):
+        labels = self._finish(event)
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, labels)
+
+    def failed(self, event):
+        labels = self._finish(event)
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, labels)
+        MONGO_COMMAND_FAILURES.inc(labels)
+
+EVENT_LOOP_LAG = metrics_registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay between when the lag probe should wake and when it did"))
+
+# Event loop diagnostics
+# A probe task on the loop records scheduling lag. A watchdog thread watches
+# the probe's heartbeat; when the loop stops ticking for longer than the
+# threshold it samples the loop thread's stack while the blocking code is
+# still running, together with the routes in flight at that moment.
+LOOP_LAG_INTERVAL = float(os.environ.get('LOOP_LAG_INTERVAL', '0.1'))
+LOOP_LAG_THRESHOLD = float(os.environ.get('LOOP_LAG_THRESHOLD', '0.25'))
+SLOW_REQUEST_THRESHOLD = float(os.environ.get('SLOW_REQUEST_THRESHOLD', '1.0'))
+DIAGNOSTICS_RING_SIZE = int(os.environ.get('DIAGNOSTICS_RING_SIZE', '50'))
+STACK_SAMPLE_DEPTH = 20
+
+class LoopLagMonitor:
+    def __init__(self, interval: float, lag_threshold: float, slow_request_threshold: float, ring_size: int):
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.slow_request_threshold = slow_request_threshold
+        self.offenders = deque(maxlen=ring_size)
+        self.active_requests = {}
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._last_tick = time.monotonic()
+        self._loop_thread_id = None
+        self._stall_sample = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task = None
+        self._watchdog = None
+
+    def _active_routes(self) -> List[str]:
+        try:
+            scopes = list(self.active_requests.values())
+        except RuntimeError:
+            return []
+        return [f"{scope['method']} {getattr(scope.get('route'), 'path', scope['path'])}" for scope in scopes]
+
+    def _record(self, kind: str, duration: float, routes: List[str], stack: Optional[str] = None):
+        self.offenders.append({
+            "kind": kind,
+            "at": datetime.utcnow(),
+            "duration": round(duration, 4),
+            "routes": routes,
+            "stack": stack,
+        })
+
+    async def _probe(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            lag = max(0.0, now - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.lag_threshold:
+                with self._lock:
+                    sample, self._stall_sample = self._stall_sample, None
+                routes = sample["routes"] if sample else self._active_routes()
+                stack = sample["stack"] if sample else None
+                self._record("loop_lag", lag, routes, stack)
+                logger.warning(f"Event loop blocked for {lag:.3f}s while serving {routes or 'no requests'}")
+                if stack:
+                    logger.warning(f"Blocking stack sample:\n{stack}")
+
+    def _watch(self):
+        sampled = False
+        while not self._stop.wait(self.interval):
+            stalled = time.monotonic() - self._last_tick
+            if stalled < self.lag_threshold:
+                sampled = False
+                continue
+            if sampled:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)[-STACK_SAMPLE_DEPTH:]) if frame else None
+            with self._lock:
+                self._stall_sample = {"routes": self._active_routes(), "stack": stack}
+            sampled = True
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._probe())
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def request_started(self, scope):
+        self.active_requests[id(scope)] = scope
+
+    def request_detached(self, scope):
+        # Long-lived streams stop counting as in flight once their headers are
+        # sent; they would otherwise show up in every stall report and end as
+        # a "slow request" lasting as long as the connection
+        self.active_requests.pop(id(scope), None)
+
+    def request_finished(self, scope, duration: float):
+        self.active_requests.pop(id(scope), None)
+        if duration >= self.slow_request_threshold:
+            route = f"{scope['method']} {getattr(scope.get('route'), 'path', scope['path'])}"
+            self._record("slow_request", duration, [route])
+            logger.warning(f"Slow request: {route} took {duration:.3f}s")
+
+    def worst_offenders(self) -> List[dict]:
+        return sorted(self.offenders, key=lambda offender: offender["duration"], reverse=True)
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "lag_threshold": self.lag_threshold,
+            "slow_request_threshold": self.slow_request_threshold,
+            "last_lag": round(self.last_lag, 4),
+            "max_lag": round(self.max_lag, 4),
+            "active_requests": len(self.active_requests),
+            "offenders": len(self.offenders),
+        }
+
+loop_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL, LOOP_LAG_THRESHOLD, SLOW_REQUEST_THRESHOLD, DIAGNOSTICS_RING_SIZE)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status and concurrency."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        streaming = False
+        
+        async def send_with_status(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = MutableHeaders(raw=message["headers"]).get("content-type", "")
+                if content_type.startswith("text/event-stream"):
+                    # Idle streams are not load: stop counting them as in flight
+                    streaming = True
+                    HTTP_REQUESTS_IN_FLIGHT.dec()
+                    loop_monitor.request_detached(scope)
+            await send(message)
+        
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        loop_monitor.request_started(scope)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started_at
+            if not streaming:
+                HTTP_REQUESTS_IN_FLIGHT.dec()
+                loop_monitor.request_finished(scope, duration)
+            # FastAPI stores the matched route in the scope; label by its
+            # template so path parameters do not explode the label set
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_DURATION.observe(duration, (scope["method"], route_path))
+            HTTP_REQUESTS.inc((scope["method"], route_path, str(status_code)))
+
+# In-process caches
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        value, expires = entry
+        if time.monotonic() >= expires:
+            del self._data[key]
+            self.counters["expirations"] += 1
+            self.counters["misses"] += 1
+            return None
+        self._data.move_to_end(key)
+        self.counters["hits"] += 1
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def invalidate(self, key):
+        if self._data.pop(key, None) is not None:
+            self.counters["invalidations"] += 1
+
+    def clear(self):
+        self.counters["invalidations"] += len(self._data)
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0,
+            **self.counters,
+        }
+
+# Response compression
+# Bodies of at least COMPRESSION_MIN_SIZE bytes are compressed with brotli
+# (when installed and accepted) or gzip. Streaming responses such as the SSE
+# stream pass through untouched. Compressed bodies that carry an ETag are
+# cached, so repeated reads of an unchanged list are compressed only once.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '4'))
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+COMPRESSED_CACHE_MAX_ENTRIES = int(os.environ.get('COMPRESSED_CACHE_MAX_ENTRIES', '512'))
+COMPRESSED_CACHE_TTL = float(os.environ.get('COMPRESSED_CACHE_TTL', '300'))
+
+compressed_responses = TTLCache(COMPRESSED_CACHE_MAX_ENTRIES, COMPRESSED_CACHE_TTL)
+
+@lru_cache(maxsize=None)
+def load_brotli():
+    # Imported on the first compressed response rather than at startup
+    try:
+        import brotli
+    except ImportError:  # brotli is optional; gzip is always available
+        return None
+    return brotli
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    if "br" in accepted and load_brotli() is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return load_brotli().compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating gzip/brotli compression."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        passthrough = False
+        
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            )
+            if not compressible:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            
+            etag = headers.get("etag")
+            cache_key = (scope["path"], etag, encoding) if etag else None
+            compressed = compressed_responses.get(cache_key) if cache_key else None
+            if compressed is None:
+                compressed = compress_body(body, encoding)
+                if cache_key:
+                    compressed_responses.set(cache_key, compressed)
+            
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            if etag and not etag.startswith("W/"):
+                # The compressed bytes differ from the identity ones, so the
+                # validator becomes weak; etag_matches() compares weakly
+                headers["ETag"] = f"W/{etag}"
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+        
+        await self.app(scope, receive, send_compressed)
+
+# MongoDB connection settings
+# Pool options are only passed to the driver when set, so unset variables keep
+# the driver defaults (maxPoolSize=100, no wait queue timeout, 30s server
+# selection).
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", int),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", int),
+    "maxIdleTimeMS": ("MONGO_MAX_IDLE_TIME_MS", int),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", int),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", int),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", int),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", int),
+}
+# Auth and admin routes always use the primary; public reads (/analysis,
+# /valuable-tips, /stats) use MONGO_PUBLIC_READ_PREFERENCE, which can point
+# them at secondaries, e.g. "secondaryPreferred".
+MONGO_PUBLIC_READ_PREFERENCE = os.environ.get('MONGO_PUBLIC_READ_PREFERENCE', 'primary')
+MONGO_MAX_STALENESS_SECONDS = int(os.environ.get('MONGO_MAX_STALENESS_SECONDS', '-1'))
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def make_read_preference(mode: str, max_staleness: int = -1):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+def mongo_client_options() -> dict:
+    options = {}
+    for option, (env_name, cast) in MONGO_CLIENT_OPTIONS.items():
+        if os.environ.get(env_name):
+            options[option] = cast(os.environ[env_name])
+    return options
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage for capacity planning.
+
+    The driver calls these hooks from its own threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "open": 0,
+            "checked_out": 0,
+            "max_checked_out": 0,
+            "waiting": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "pool_clears": 0,
+        }
+
+    def _update(self, **changes):
+        with self._lock:
+            for name, change in changes.items():
+                self.counters[name] += change
+            self.counters["max_checked_out"] = max(self.counters["max_checked_out"], self.counters["checked_out"])
+
+    def connection_created(self, event):
+        self._update(open=1)
+
+    def connection_closed(self, event):
+        self._update(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(waiting=1)
+
+    def connection_checked_out(self, event):
+        self._update(waiting=-1, checked_out=1, checkouts=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(waiting=-1, checkout_failures=1)
+
+    def connection_checked_in(self, event):
+        self._update(checked_out=-1)
+
+    def pool_cleared(self, event):
+        self._update(pool_clears=1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "options": mongo_client_options(), "public_read_preference": MONGO_PUBLIC_READ_PREFERENCE}
+
+pool_monitor = PoolMonitor()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[pool_monitor, MongoCommandMonitor()], **mongo_client_options())
 db = client[os.environ['DB_NAME']]
+public_db = client.get_database(
+    os.environ['DB_NAME'],
+    read_preference=make_read_preference(MONGO_PUBLIC_READ_PREFERENCE, MONGO_MAX_STALENESS_SECONDS)
+)
+
+# Responses
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded by pydantic-core.
+
+    For routes that return plain data, FastAPI has already run
+    serialize_response() and jsonable_encoder() before render(), so this only
+    replaces the final json.dumps. Routes that build the instance themselves
+    skip that pass, and pydantic-core then encodes datetimes and enums
+    directly.
+    """
+
+    def render(self, content) -> bytes:
+        return pydantic_core.to_json(content)
 
 # Create the main app without a prefix
-app = FastAPI(title="Núcleo Bets API", description="Sistema de análises de futebol")
+app = FastAPI(
+    title="Núcleo Bets API",
+    description="Sistema de análises de futebol",
+    default_response_class=FastJSONResponse
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -36,6 +678,105 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # Security
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Password hashing pool configuration
+# bcrypt is CPU bound (~250ms per call), so it runs in a worker pool instead of
+# on the event loop. "thread" works because bcrypt releases the GIL; "process"
+# isolates the CPU cost entirely at the price of pickling overhead.
+PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_MAX_CONCURRENCY', str(PASSWORD_HASH_WORKERS)))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', '5'))
+
+# Login throttling configuration
+# Token buckets per username and per client IP: BURST attempts at once, then
+# RATE attempts per second. With LOGIN_THROTTLE_BACKEND=mongo the buckets are
+# also shared by all workers through the login_throttle collection.
+# The per-IP limiter only runs once LOGIN_PROXY_HOPS says where the client IP
+# comes from: 0 uses the socket peer (direct exposure, or uvicorn started with
+# --proxy-headers), N > 0 the N-th X-Forwarded-For entry from the right. Left
+# unset, every client behind a proxy would share the proxy's address and one
+# bucket, so only the per-username limiter runs.
+LOGIN_USERNAME_RATE = float(os.environ.get('LOGIN_USERNAME_RATE', '0.1'))
+LOGIN_USERNAME_BURST = float(os.environ.get('LOGIN_USERNAME_BURST', '5'))
+LOGIN_IP_RATE = float(os.environ.get('LOGIN_IP_RATE', '0.5'))
+LOGIN_IP_BURST = float(os.environ.get('LOGIN_IP_BURST', '30'))
+LOGIN_THROTTLE_MAX_KEYS = int(os.environ.get('LOGIN_THROTTLE_MAX_KEYS', '100000'))
+LOGIN_THROTTLE_BACKEND = os.environ.get('LOGIN_THROTTLE_BACKEND', 'memory')
+LOGIN_PROXY_HOPS = int(os.environ['LOGIN_PROXY_HOPS']) if os.environ.get('LOGIN_PROXY_HOPS') else None
+
+# Maximum number of analyses settled by one POST /admin/analysis/settle
+MAX_SETTLEMENT_BATCH = int(os.environ.get('MAX_SETTLEMENT_BATCH', '500'))
+
+# Maximum number of explicit ids accepted by the bulk user routes
+MAX_USER_BATCH = int(os.environ.get('MAX_USER_BATCH', '1000'))
+
+# Pagination configuration
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '200'))
+
+# Authenticated user cache configuration
+# User writes bump a shared "users" version. Entries cached under an older
+# version are dropped, and each worker rereads the version at most every
+# USER_VERSION_CHECK_SECONDS, which bounds how long another worker can keep
+# accepting a deleted or deactivated user.
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '30'))
+USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', '10000'))
+USER_VERSION_CHECK_SECONDS = float(os.environ.get('USER_VERSION_CHECK_SECONDS', '1'))
+USERS_VERSION_ID = "users"
+
+# Background jobs configuration
+# Only the worker holding the "background-jobs" lease runs periodic jobs; the
+# lease expires after LEADER_LEASE_SECONDS so another worker takes over if
+# the leader dies.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+LEADER_LEASE_SECONDS = float(os.environ.get('LEADER_LEASE_SECONDS', '30'))
+STATS_RECONCILE_INTERVAL = float(os.environ.get('STATS_RECONCILE_INTERVAL', '3600'))
+
+# Startup warm-up and readiness configuration
+MONGO_WARMUP_CONNECTIONS = int(os.environ.get('MONGO_WARMUP_CONNECTIONS', '5'))
+READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', '5'))
+READINESS_PING_TIMEOUT = float(os.environ.get('READINESS_PING_TIMEOUT', '2'))
+WARMUP_RETRY_SECONDS = float(os.environ.get('WARMUP_RETRY_SECONDS', '5'))
+
+# Performance time series configuration
+TIMESERIES_DEFAULT_DAYS = int(os.environ.get('TIMESERIES_DEFAULT_DAYS', '365'))
+TIMESERIES_MAX_DAYS = int(os.environ.get('TIMESERIES_MAX_DAYS', '3660'))
+
+# Numeric fields migration configuration
+# Documents written before the numeric odds/stake fields existed are filled
+# in by the background jobs leader in batches of MIGRATION_BATCH_SIZE, with
+# a pause between batches so the migration never monopolizes the database.
+MIGRATION_BATCH_SIZE = int(os.environ.get('MIGRATION_BATCH_SIZE', '500'))
+MIGRATION_BATCH_PAUSE = float(os.environ.get('MIGRATION_BATCH_PAUSE', '0.05'))
+
+# Analysis search configuration
+# Search pages are offsets into the relevance-ranked matches, capped at
+# MAX_SEARCH_RESULTS so a broad term cannot be paged through endlessly.
+MAX_SEARCH_RESULTS = int(os.environ.get('MAX_SEARCH_RESULTS', '500'))
+SEARCH_QUERY_MAX_LENGTH = 100
+
+# Encoded response cache configuration
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', '300'))
+
+# Event stream configuration
+STREAM_MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', '5000'))
+STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', '32'))
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', '15'))
+# EventSource cannot send headers, so the frontend trades its access token for
+# a short-lived ticket usable only on /api/stream; only that ticket ends up in
+# access logs
+STREAM_TICKET_SECONDS = int(os.environ.get('STREAM_TICKET_SECONDS', '60'))
+# Events are shared between workers through the stream_events collection;
+# every worker polls it every STREAM_RELAY_INTERVAL seconds and waits up to
+# STREAM_GAP_TIMEOUT for an event whose sequence number was taken but which
+# is not written yet before skipping it.
+STREAM_RELAY_INTERVAL = float(os.environ.get('STREAM_RELAY_INTERVAL', '1'))
+STREAM_GAP_TIMEOUT = float(os.environ.get('STREAM_GAP_TIMEOUT', '5'))
+STREAM_EVENTS_TTL_SECONDS = 3600
+STREAM_SEQUENCE_ID = "stream_events"
 
 # Enums
 class UserRole(str, Enum):
@@ -85,6 +826,16 @@ class AdminUserCreate(BaseModel):
     role: UserRole = UserRole.USER
     approved_by_admin: bool = True
 
+class UserBatchFilter(BaseModel):
+    approved_by_admin: Optional[bool] = None
+    is_active: Optional[bool] = None
+    created_before: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+
+class UserBatch(BaseModel):
+    ids: Optional[List[str]] = None
+    filter: Optional[UserBatchFilter] = None
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -102,6 +853,10 @@ class ValuableTip(BaseModel):
     total_odds: str
     stake_suggestion: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Parsed from total_odds and stake_suggestion; None when unparsable
+    total_odds_value: Optional[float] = None
+    stake_min_percent: Optional[float] = None
+    stake_max_percent: Optional[float] = None
 
 class ValuableTipCreate(BaseModel):
     title: str
@@ -128,6 +883,20 @@ class Analysis(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     match_date: datetime
     result: AnalysisResult = AnalysisResult.PENDING
+    # Decimal odds parsed from odds; None when missing or unparsable
+    odds_value: Optional[float] = None
+
+class AnalysisSummary(BaseModel):
+    id: str
+    title: str
+    match_info: str
+    bet_type: BetType
+    confidence: float
+    odds: Optional[str] = None
+    created_at: datetime
+    match_date: datetime
+    result: AnalysisResult = AnalysisResult.PENDING
+    odds_value: Optional[float] = None
 
 class AnalysisCreate(BaseModel):
     title: str
@@ -148,6 +917,10 @@ class AnalysisUpdate(BaseModel):
     match_date: Optional[datetime] = None
     result: Optional[AnalysisResult] = None
 
+class AnalysisSettlement(BaseModel):
+    id: str
+    result: AnalysisResult
+
 # Utility functions
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -155,6 +928,121 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+class PasswordHasher:
+    """Runs bcrypt jobs in a bounded worker pool off the event loop."""
+
+    def __init__(self, executor_kind: str, workers: int, max_concurrency: int, queue_timeout: float):
+        self.executor_kind = executor_kind
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._executor = None
+        self._semaphore = None
+        self.counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "waiting": 0,
+            "queue_wait_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.counters["submitted"] += 1
+        self.counters["waiting"] += 1
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counters["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor ocupado, tente novamente em instantes",
+                headers={"Retry-After": str(max(1, int(self.queue_timeout)))}
+            )
+        finally:
+            queue_wait = time.perf_counter() - queued_at
+            self.counters["waiting"] -= 1
+            self.counters["queue_wait_seconds"] += queue_wait
+            PASSWORD_HASH_QUEUE_WAIT.observe(queue_wait, (operation,))
+
+        self.counters["in_flight"] += 1
+        started_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), func, *args)
+            self.counters["completed"] += 1
+            return result
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            run_time = time.perf_counter() - started_at
+            self.counters["in_flight"] -= 1
+            self.counters["run_seconds"] += run_time
+            PASSWORD_HASH_DURATION.observe(run_time, (operation,))
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run("verify", verify_password, password, hashed)
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_timeout": self.queue_timeout,
+            **self.counters,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_CONCURRENCY,
+    PASSWORD_HASH_QUEUE_TIMEOUT,
+)
+
+user_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL)
+users_version = {"value": 0, "checked_at": None}
+
+async def current_users_version() -> int:
+    now = time.monotonic()
+    if users_version["checked_at"] is None or now - users_version["checked_at"] >= USER_VERSION_CHECK_SECONDS:
+        doc = await db.versions.find_one({"_id": USERS_VERSION_ID})
+        users_version["value"] = doc["v"] if doc else 0
+        users_version["checked_at"] = now
+    return users_version["value"]
+
+async def invalidate_cached_users(user_ids: Optional[List[str]] = None):
+    """Drop users from this worker's cache and expire them on the others."""
+    if user_ids is None:
+        user_cache.clear()
+    else:
+        for user_id in user_ids:
+            user_cache.invalidate(user_id)
+    await db.versions.update_one({"_id": USERS_VERSION_ID}, {"$inc": {"v": 1}}, upsert=True)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -165,52 +1053,1033 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def create_stream_ticket(user_id: str, session_expires_at: int) -> str:
+    expire = datetime.utcnow() + timedelta(seconds=STREAM_TICKET_SECONDS)
+    payload = {"sub": user_id, "typ": "stream", "session_exp": session_expires_at, "exp": expire}
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_token(token: str, token_type: Optional[str] = None) -> dict:
+    """Verify a JWT; access tokens carry no "typ", stream tickets "stream"."""
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Token inválido")
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Token inválido")
-    
-    user = await db.users.find_one({"id": user_id})
+    if payload.get("sub") is None or payload.get("typ") != token_type:
+        raise HTTPException(status_code=401, detail="Token inválido")
+    return payload
+
+async def load_token_user(user_id: str) -> User:
+    # Read the version before the user, so a write landing in between leaves
+    # the new entry already stale
+    version = await current_users_version()
+    entry = user_cache.get(user_id)
+    user = entry[0] if entry is not None and entry[1] == version else None
     if user is None:
-        raise HTTPException(status_code=401, detail="Usuário não encontrado")
+        user_doc = await db.users.find_one({"id": user_id})
+        if user_doc is None:
+            raise HTTPException(status_code=401, detail="Usuário não encontrado")
+        user = User(**user_doc)
+        cache_ttl = None
+        if user.role != UserRole.ADMIN and user.expires_at:
+            cache_ttl = (user.expires_at.replace(tzinfo=None) - datetime.utcnow()).total_seconds()
+        user_cache.set(user_id, (user, version), ttl=cache_ttl)
     
     # Check if user expired (only for non-admin users)
-    if user.get("role") != UserRole.ADMIN and user.get("expires_at"):
-        expires_at = user["expires_at"]
-        if isinstance(expires_at, str):
-            expires_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
-        if datetime.utcnow() > expires_at:
+    if user.role != UserRole.ADMIN and user.expires_at:
+        if datetime.utcnow() > user.expires_at.replace(tzinfo=None):
             # Delete expired user
             await db.users.delete_one({"id": user_id})
+            await invalidate_cached_users([user_id])
             raise HTTPException(status_code=401, detail="Conta expirada")
     
-    return User(**user)
+    return user
+
+async def resolve_token_user(token: str) -> User:
+    return await load_token_user(decode_token(token)["sub"])
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await resolve_token_user(credentials.credentials)
+
+async def get_stream_session(
+    ticket: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> tuple:
+    """(user, epoch second at which the stream must end) for /api/stream."""
+    if credentials is not None:
+        payload = decode_token(credentials.credentials)
+        session_expires_at = payload["exp"]
+    elif ticket:
+        payload = decode_token(ticket, "stream")
+        session_expires_at = payload["session_exp"]
+    else:
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    return await load_token_user(payload["sub"]), session_expires_at
 
 async def get_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Acesso negado. Apenas administradores.")
     return current_user
 
-# Background task to clean expired users
-async def cleanup_expired_users():
+# Login throttling
+class TokenBucketLimiter:
+    """Token buckets keyed by an arbitrary string.
+
+    Buckets live in a bounded LRU map; the least recently used bucket is the
+    one that has refilled the longest, so evicting it loses little. With a
+    shared collection every attempt also takes a token from a Mongo bucket
+    updated atomically by one pipeline update, so limits hold across workers.
+    """
+
+    def __init__(self, scope: str, rate: float, burst: float, max_keys: int, shared=None):
+        self.scope = scope
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.shared = shared
+        self._buckets = OrderedDict()
+        self.counters = {"allowed": 0, "throttled": 0, "evictions": 0, "shared_errors": 0}
+
+    def _take_local(self, key: str) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.counters["evictions"] += 1
+        return retry_after
+
+    async def _take_shared(self, key: str) -> float:
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+        refilled = {"$min": [self.burst, {"$add": [{"$ifNull": ["$tokens", self.burst]}, {"$multiply": [elapsed, self.rate]}]}]}
+        # Idle buckets are full again after burst / rate seconds; let the TTL index drop them
+        ttl_ms = int(self.burst / self.rate * 1000) + 1000
+        bucket = await self.shared.find_one_and_update(
+            {"_id": f"{self.scope}:{key}"},
+            [
+                {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": {"$add": ["$$NOW", ttl_ms]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return 0.0 if bucket["allowed"] else (1 - bucket["tokens"]) / self.rate
+
+    async def acquire(self, key: str) -> float:
+        """Take one token for key; returns 0 when allowed, else seconds to wait."""
+        retry_after = self._take_local(key)
+        if not retry_after and self.shared is not None:
+            try:
+                retry_after = await self._take_shared(key)
+            except Exception as e:
+                # Fail open to the local bucket rather than locking everyone out
+                self.counters["shared_errors"] += 1
+                logger.warning(f"Shared login throttle unavailable: {e}")
+        if retry_after:
+            self.counters["throttled"] += 1
+            LOGIN_THROTTLED.inc((self.scope,))
+        else:
+            self.counters["allowed"] += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "scope": self.scope,
+            "rate": self.rate,
+            "burst": self.burst,
+            "keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "shared": self.shared is not None,
+            **self.counters,
+        }
+
+login_throttle_collection = db.login_throttle if LOGIN_THROTTLE_BACKEND == "mongo" else None
+login_limiters = {
+    "username": TokenBucketLimiter("username", LOGIN_USERNAME_RATE, LOGIN_USERNAME_BURST, LOGIN_THROTTLE_MAX_KEYS, login_throttle_collection),
+}
+if LOGIN_PROXY_HOPS is not None:
+    login_limiters["ip"] = TokenBucketLimiter("ip", LOGIN_IP_RATE, LOGIN_IP_BURST, LOGIN_THROTTLE_MAX_KEYS, login_throttle_collection)
+
+def client_ip(request: Request) -> Optional[str]:
+    """The client address per LOGIN_PROXY_HOPS, or None when it cannot be told apart from a proxy."""
+    if LOGIN_PROXY_HOPS is None:
+        return None
+    if LOGIN_PROXY_HOPS > 0:
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        # Fewer entries than proxies: the request skipped a proxy or the count is wrong
+        return forwarded[-LOGIN_PROXY_HOPS] if len(forwarded) >= LOGIN_PROXY_HOPS else None
+    return request.client.host if request.client else None
+
+async def check_login_throttle(request: Request, username: str):
+    """Reject the attempt with 429 before any user lookup or bcrypt work."""
+    retry_after = 0.0
+    ip = client_ip(request)
+    if ip is not None and "ip" in login_limiters:
+        retry_after = await login_limiters["ip"].acquire(ip)
+    if not retry_after:
+        retry_after = await login_limiters["username"].acquire(username.lower())
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Muitas tentativas de login. Tente novamente mais tarde.",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+# Database indexes
+# Expired non-admin users are removed by the TTL index on users.expires_at
+# (Mongo's TTL monitor runs every ~60s), so no polling cleanup task is needed.
+INDEXES = {
+    "users": [
+        {"keys": [("id", 1)], "name": "id_unique", "unique": True},
+        {"keys": [("username", 1)], "name": "username_unique", "unique": True},
+        {"keys": [("email", 1)], "name": "email_unique", "unique": True},
+        {"keys": [("created_at", -1), ("id", -1)], "name": "created_at_id"},
+        {
+            "keys": [("expires_at", 1)],
+            "name": "expires_at_ttl",
+            "expireAfterSeconds": 0,
+            "partialFilterExpression": {"role": UserRole.USER.value},
+        },
+    ],
+    "analyses": [
+        {"keys": [("id", 1)], "name": "id_unique", "unique": True},
+        {"keys": [("created_at", -1), ("id", -1)], "name": "created_at_id"},
+        # Filtered listings (see analysis_filters): equality filters followed
+        # by the page sort, so a result or bet type listing is walked in
+        # order without an in-memory sort; match date windows ("pending
+        # today") are a range scan whose few hits are sorted in memory.
+        # Confidence bounds are applied as a residual filter on these.
+        {"keys": [("result", 1), ("created_at", -1), ("id", -1)], "name": "result_created_at_id"},
+        {"keys": [("bet_type", 1), ("created_at", -1), ("id", -1)], "name": "bet_type_created_at_id"},
+        {"keys": [("result", 1), ("match_date", 1)], "name": "result_match_date"},
+        {"keys": [("match_date", 1)], "name": "match_date"},
+        {"keys": [("odds_value", 1)], "name": "odds_value"},
+        # Text indexes ignore diacritics, and the Portuguese stemmer makes
+        # "São Paulo" match "sao paulo" and "vitória" match "vitorias"
+        {
+            "keys": [("title", "text"), ("match_info", "text"), ("detailed_analysis", "text")],
+            "name": "text_search",
+            "weights": {"title": 10, "match_info": 5, "detailed_analysis": 1},
+            "default_language": "portuguese",
+        },
+    ],
+    "valuable_tips": [
+        {"keys": [("id", 1)], "name": "id_unique", "unique": True},
+        {"keys": [("created_at", -1), ("id", -1)], "name": "created_at_id"},
+        {"keys": [("total_odds_value", 1)], "name": "total_odds_value"},
+    ],
+    "stream_events": [
+        {"keys": [("created_at", 1)], "name": "created_at_ttl", "expireAfterSeconds": STREAM_EVENTS_TTL_SECONDS},
+    ],
+    "daily_stats": [
+        {"keys": [("day", 1), ("bet_type", 1)], "name": "day_bet_type"},
+    ],
+    "login_throttle": [
+        {"keys": [("expires_at", 1)], "name": "expires_at_ttl", "expireAfterSeconds": 0},
+    ],
+}
+
+INDEX_OPTIONS = ("unique", "expireAfterSeconds", "partialFilterExpression")
+
+def _index_matches(current: dict, spec: dict) -> bool:
+    if "weights" in spec:
+        # Text indexes are stored under _fts/_ftsx keys, so compare the weighted fields instead
+        return all(current.get(option) == spec[option] for option in ("weights", "default_language"))
+    current_keys = [(field, int(direction)) for field, direction in current["key"]]
+    if current_keys != spec["keys"]:
+        return False
+    return all(current.get(option) == spec.get(option) for option in INDEX_OPTIONS)
+
+async def ensure_indexes() -> dict:
+    """Create missing indexes and report what changed.
+
+    Safe to run on every startup: indexes that already exist with the same
+    definition are left alone, and conflicting definitions are reported
+    instead of being dropped.
+    """
+    report = {"created": [], "existing": [], "conflicts": [], "failed": []}
+    
+    async def ensure_collection_indexes(collection_name: str, specs: list):
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        for spec in specs:
+            label = f"{collection_name}.{spec['name']}"
+            current = existing.get(spec["name"])
+            if current is not None:
+                report["existing" if _index_matches(current, spec) else "conflicts"].append(label)
+                continue
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                await collection.create_index(spec["keys"], **options)
+                report["created"].append(label)
+            except OperationFailure as e:
+                report["failed"].append({"index": label, "error": str(e)})
+    
+    # Collections are independent, so check them concurrently
+    await asyncio.gather(*[ensure_collection_indexes(name, specs) for name, specs in INDEXES.items()])
+
+    if report["created"]:
+        logger.info(f"Created indexes: {', '.join(report['created'])}")
+    if report["conflicts"]:
+        logger.warning(f"Indexes with conflicting definitions: {', '.join(report['conflicts'])}")
+    for failure in report["failed"]:
+        logger.error(f"Error creating index {failure['index']}: {failure['error']}")
+    return report
+
+index_report: dict = {}
+
+# Keyset pagination
+# Lists are ordered by (created_at, id) descending, which the created_at_id
+# indexes cover. The cursor is the sort key of the last document of the page,
+# so every page costs the same index range scan regardless of depth.
+PAGE_SORT = [("created_at", -1), ("id", -1)]
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(doc: dict) -> str:
+    payload = json.dumps({"c": doc["created_at"].isoformat(), "i": doc["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        created_at = datetime.fromisoformat(payload["c"])
+        last_id = str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": last_id}},
+    ]}
+
+def encode_offset_cursor(offset: int) -> str:
+    payload = json.dumps({"o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip("=")
+
+def decode_offset_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))["o"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return offset
+
+async def fetch_page(collection, query: dict, limit: int, cursor: Optional[str] = None, projection: Optional[dict] = None):
+    """Return one page of documents and the cursor of the next page (or None)."""
+    if cursor:
+        query = {"$and": [query, decode_cursor(cursor)]} if query else decode_cursor(cursor)
+    docs = await collection.find(query, projection).sort(PAGE_SORT).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+# Encoders for list responses serialized directly to bytes: one validation
+# pass plus a Rust JSON dump, instead of building models and then having
+# FastAPI validate and encode them again
+ANALYSIS_LIST = TypeAdapter(List[Analysis])
+ANALYSIS_SUMMARY_LIST = TypeAdapter(List[AnalysisSummary])
+VALUABLE_TIP_LIST = TypeAdapter(List[ValuableTip])
+
+def json_list_response(adapter: TypeAdapter, docs: list, next_cursor: Optional[str] = None) -> Response:
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=adapter.dump_json(adapter.validate_python(docs)), media_type="application/json", headers=headers)
+
+# Listing projections: only the fields the response model needs, never _id
+ANALYSIS_SUMMARY_PROJECTION = {"_id": 0, **{field: 1 for field in AnalysisSummary.model_fields}}
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+# Analysis list filters
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Dates are stored as naive datetimes; aware inputs are converted to UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def analysis_filters(
+    match_date_from: Optional[datetime] = None,
+    match_date_to: Optional[datetime] = None,
+    bet_type: Optional[BetType] = None,
+    result: Optional[AnalysisResult] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=100),
+    max_confidence: Optional[float] = Query(None, ge=0, le=100),
+    min_odds: Optional[float] = Query(None, ge=1),
+    max_odds: Optional[float] = Query(None, ge=1)
+) -> dict:
+    """Build the Mongo query for the optional analysis list filters."""
+    query = {}
+    if result is not None:
+        query["result"] = result.value
+    if bet_type is not None:
+        query["bet_type"] = bet_type.value
+    
+    match_date_from, match_date_to = _naive_utc(match_date_from), _naive_utc(match_date_to)
+    if match_date_from and match_date_to and match_date_from > match_date_to:
+        raise HTTPException(status_code=400, detail="Intervalo de datas inválido")
+    match_date = {}
+    if match_date_from is not None:
+        match_date["$gte"] = match_date_from
+    if match_date_to is not None:
+        match_date["$lte"] = match_date_to
+    if match_date:
+        query["match_date"] = match_date
+    
+    if min_confidence is not None and max_confidence is not None and min_confidence > max_confidence:
+        raise HTTPException(status_code=400, detail="Intervalo de confiança inválido")
+    confidence = {}
+    if min_confidence is not None:
+        confidence["$gte"] = min_confidence
+    if max_confidence is not None:
+        confidence["$lte"] = max_confidence
+    if confidence:
+        query["confidence"] = confidence
+    
+    if min_odds is not None and max_odds is not None and min_odds > max_odds:
+        raise HTTPException(status_code=400, detail="Intervalo de odds inválido")
+    odds = {}
+    if min_odds is not None:
+        odds["$gte"] = min_odds
+    if max_odds is not None:
+        odds["$lte"] = max_odds
+    if odds:
+        query["odds_value"] = odds
+    return query
+
+# Collection versions and ETags
+# Every admin write bumps a monotonically increasing version per collection.
+# Public reads derive a strong ETag from the versions they depend on, so a
+# matching If-None-Match is answered with 304 after one _id lookup and
+# without reading or serializing the data.
+async def get_collection_versions(*names: str) -> dict:
+    # Read with the public read preference, like the data the versions tag
+    docs = await public_db.versions.find({"_id": {"$in": list(names)}}).to_list(len(names))
+    versions = {doc["_id"]: doc["v"] for doc in docs}
+    return {name: versions.get(name, 0) for name in names}
+
+async def bump_collection_version(name: str):
+    await db.versions.update_one({"_id": name}, {"$inc": {"v": 1}}, upsert=True)
+    response_cache.clear()
+
+def make_etag(request: Request, versions: dict, variant: str = "") -> str:
+    # variant carries inputs the query string does not pin down, such as a
+    # date window that defaults to "today"
+    tag = ".".join(f"{name}{version}" for name, version in versions.items())
+    selector = "|".join(part for part in (request.url.query, variant) if part)
+    if selector:
+        tag += "." + hashlib.sha1(selector.encode('utf-8')).hexdigest()[:12]
+    return f'"{tag}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so W/ prefixes (added when the
+    # response was compressed) are ignored
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+async def check_not_modified(request: Request, response: Response, *collections: str) -> Optional[Response]:
+    """Return a 304 response if the client copy is current, else tag response."""
+    etag = make_etag(request, await get_collection_versions(*collections))
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    response.headers.update(etag_headers(etag))
+    return None
+
+# Encoded response cache
+# Public list endpoints cache their final JSON bytes per (path, query,
+# variant). An entry is only served while the collection versions it was
+# built from are still current, so a write on any worker is picked up through
+# the same version lookup the ETag check already does. Writes on this worker also
+# clear the cache synchronously in bump_collection_version().
+response_cache = TTLCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL)
+
+async def cached_json_response(request: Request, collections: tuple, build, variant: str = "") -> Response:
+    """Serve build()'s (body, headers) from the cache, rebuilding when stale."""
+    versions = await get_collection_versions(*collections)
+    etag = make_etag(request, versions, variant)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    
+    body, headers = await load_cached_response((request.url.path, request.url.query, variant), versions, build)
+    return Response(content=body, media_type="application/json", headers={**headers, **etag_headers(etag)})
+
+async def load_cached_response(key: tuple, versions: dict, build):
+    entry = response_cache.get(key)
+    if entry is None or entry[0] != versions:
+        body, headers = await build()
+        entry = (versions, body, headers)
+        response_cache.set(key, entry)
+    return entry[1], entry[2]
+
+# Server-Sent Events
+class EventBroker:
+    """Fan-out of change events to /api/stream subscribers across workers.
+
+    Each subscriber owns a bounded queue. Messages are encoded once per
+    publish and shared by every queue. A subscriber that falls behind has its
+    backlog replaced by a single "resync" event instead of growing without
+    bound, and the registry itself is capped at max_subscribers.
+
+    Every event gets a sequence number from the versions collection and is
+    stored in stream_events. The publishing worker delivers it to its own
+    subscribers right away; the other workers pick it up in relay_once().
+    """
+
+    RESYNC = b"event: resync\ndata: {}\n\n"
+
+    def __init__(self, max_subscribers: int, queue_size: int, worker_id: str = WORKER_ID):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.worker_id = worker_id
+        self._subscribers = set()
+        self._last_sequence = None
+        self._gap_since = None
+        self.counters = {
+            "published": 0, "delivered": 0, "resyncs": 0, "rejected": 0,
+            "relayed": 0, "gaps_skipped": 0, "shared_errors": 0,
+        }
+
+    def check_capacity(self):
+        if len(self._subscribers) >= self.max_subscribers:
+            self.counters["rejected"] += 1
+            raise HTTPException(status_code=503, detail="Limite de conexões atingido", headers={"Retry-After": "30"})
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    @staticmethod
+    def encode(sequence: Optional[int], event: str, data: dict) -> bytes:
+        event_id = f"id: {sequence}\n" if sequence is not None else ""
+        return f"{event_id}event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n".encode('utf-8')
+
+    def fan_out(self, message: bytes):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+                self.counters["delivered"] += 1
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.RESYNC)
+                self.counters["resyncs"] += 1
+
+    async def publish(self, event: str, data: dict):
+        self.counters["published"] += 1
+        sequence = None
+        try:
+            counter = await db.versions.find_one_and_update(
+                {"_id": STREAM_SEQUENCE_ID}, {"$inc": {"v": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            sequence = counter["v"]
+        except Exception as e:
+            self.counters["shared_errors"] += 1
+            logger.warning(f"Stream event {event} not shared with other workers: {e}")
+        
+        self.fan_out(self.encode(sequence, event, data))
+        if sequence is not None:
+            try:
+                await db.stream_events.insert_one({
+                    "_id": sequence, "event": event, "data": data,
+                    "origin": self.worker_id, "created_at": datetime.utcnow()
+                })
+            except Exception as e:
+                # The other workers skip the missing number after STREAM_GAP_TIMEOUT
+                self.counters["shared_errors"] += 1
+                logger.warning(f"Stream event {event} not shared with other workers: {e}")
+
+    async def relay_once(self):
+        """Deliver the events published by other workers since the last call."""
+        if self._last_sequence is None:
+            # Start from the current position; history is not replayed
+            counter = await db.versions.find_one({"_id": STREAM_SEQUENCE_ID})
+            self._last_sequence = counter["v"] if counter else 0
+            return
+        docs = await db.stream_events.find({"_id": {"$gt": self._last_sequence}}).sort("_id", 1).to_list(1000)
+        for doc in docs:
+            if doc["_id"] != self._last_sequence + 1:
+                # A publisher took the missing number but has not written its event yet
+                if self._gap_since is None:
+                    self._gap_since = time.monotonic()
+                if time.monotonic() - self._gap_since < STREAM_GAP_TIMEOUT:
+                    return
+                self.counters["gaps_skipped"] += 1
+            self._gap_since = None
+            self._last_sequence = doc["_id"]
+            if doc["origin"] != self.worker_id:
+                self.fan_out(self.encode(doc["_id"], doc["event"], doc["data"]))
+                self.counters["relayed"] += 1
+
+    async def run_relay(self, interval: float):
+        while True:
+            try:
+                await self.relay_once()
+            except Exception as e:
+                logger.error(f"Error relaying stream events: {e}")
+            await asyncio.sleep(interval)
+
+    def close(self):
+        # None tells every open stream to finish so shutdown is not held up
+        for queue in self._subscribers:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "max_subscribers": self.max_subscribers,
+            "queue_size": self.queue_size,
+            "last_sequence": self._last_sequence,
+            **self.counters,
+        }
+
+event_broker = EventBroker(STREAM_MAX_SUBSCRIBERS, STREAM_QUEUE_SIZE)
+
+async def event_stream(user_id: str, session_expires_at: float):
+    # Registered only once the response is being sent: a client that goes
+    # away before that never reaches this generator, so nothing would ever
+    # unregister a queue created in the route
+    queue = event_broker.subscribe()
+    try:
+        yield f"retry: {int(STREAM_HEARTBEAT_SECONDS * 1000)}\n\n".encode('utf-8')
+        while True:
+            # The stream ends with the session it was opened with
+            remaining = session_expires_at - time.time()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=min(STREAM_HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                # Re-check the account on every heartbeat so deleted and
+                # expired users stop receiving events
+                try:
+                    await load_token_user(user_id)
+                except HTTPException:
+                    break
+                message = b": heartbeat\n\n"
+            if message is None:
+                break
+            yield message
+    finally:
+        event_broker.unsubscribe(queue)
+
+def analysis_event_data(analysis: Analysis) -> dict:
+    return analysis.model_dump(include=set(AnalysisSummary.model_fields), mode="json")
+
+# Analysis statistics counters
+# /api/stats reads a single counters document instead of counting the whole
+# analyses collection. Write routes keep it up to date with $inc and
+# reconcile_analysis_stats() rebuilds it from scratch when it drifts.
+ANALYSIS_STATS_ID = "analyses"
+ANALYSIS_STATS_FIELDS = ("total", AnalysisResult.GREEN.value, AnalysisResult.RED.value, AnalysisResult.PENDING.value)
+
+def analysis_stats_delta(old_result: Optional[str], new_result: Optional[str]) -> dict:
+    """Counter increments for an analysis moving from old_result to new_result.
+
+    None stands for "does not exist", so creation is (None, result) and
+    deletion is (result, None).
+    """
+    delta = {}
+    if old_result is not None:
+        old_result = AnalysisResult(old_result).value
+        delta[old_result] = delta.get(old_result, 0) - 1
+        delta["total"] = delta.get("total", 0) - 1
+    if new_result is not None:
+        new_result = AnalysisResult(new_result).value
+        delta[new_result] = delta.get(new_result, 0) + 1
+        delta["total"] = delta.get("total", 0) + 1
+    return {field: value for field, value in delta.items() if value}
+
+async def increment_analysis_stats(delta: dict):
+    if delta:
+        await db.stats.update_one({"_id": ANALYSIS_STATS_ID}, {"$inc": delta}, upsert=True)
+
+async def count_analysis_results() -> dict:
+    counts = {field: 0 for field in ANALYSIS_STATS_FIELDS}
+    async for row in db.analyses.aggregate([{"$group": {"_id": "$result", "count": {"$sum": 1}}}]):
+        result = row["_id"] or AnalysisResult.PENDING.value
+        counts[result] = counts.get(result, 0) + row["count"]
+        counts["total"] += row["count"]
+    return counts
+
+async def reconcile_analysis_stats() -> dict:
+    """Rebuild the counters document from the analyses collection.
+
+    Returns the previous and rebuilt counters together with the drift
+    (rebuilt minus stored) for every field that disagreed.
+    """
+    stored = await db.stats.find_one({"_id": ANALYSIS_STATS_ID}) or {}
+    counts = await count_analysis_results()
+    await db.stats.replace_one({"_id": ANALYSIS_STATS_ID}, counts, upsert=True)
+    before = {field: stored.get(field, 0) for field in counts}
+    drift = {field: counts[field] - before[field] for field in counts if counts[field] != before[field]}
+    if drift:
+        logger.warning(f"Analysis stats drift corrected: {drift}")
+        await bump_collection_version("analyses")
+    return {"before": before, "after": counts, "drift": drift}
+
+# Numeric odds and stake fields
+# The free-text odds/total_odds/stake_suggestion fields keep what the admin
+# typed; parsed numeric companions are written next to them on every create
+# and update so ranges and aggregations can run in Mongo.
+STAKE_PERCENT_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:%\s*)?(?:(?:-|–|a|até)\s*(\d+(?:[.,]\d+)?)\s*)?%")
+# First standalone number, so "@1.85", "Odd 2,10" and "1.85 (Bet365)" all
+# parse while the digits inside a word such as "Bet365" are skipped
+ODDS_PATTERN = re.compile(r"(?<![\w.,])(\d+(?:[.,]\d+)?)(?!\w)")
+
+def parse_odds(odds) -> Optional[float]:
+    """Decimal odds from the free-text odds field, or None if unusable."""
+    if odds is None:
+        return None
+    match = ODDS_PATTERN.search(str(odds))
+    if match is None:
+        return None
+    value = float(match.group(1).replace(",", "."))
+    return value if math.isfinite(value) and value > 1 else None
+
+def parse_stake_percent(stake_suggestion: Optional[str]) -> tuple:
+    """(min, max) bankroll percentages from e.g. "5-10% da banca" or "3%"."""
+    match = STAKE_PERCENT_PATTERN.search(stake_suggestion or "")
+    if match is None:
+        return None, None
+    low = float(match.group(1).replace(",", "."))
+    high = float(match.group(2).replace(",", ".")) if match.group(2) else low
+    return min(low, high), max(low, high)
+
+def numeric_analysis_fields(analysis: dict) -> dict:
+    return {"odds_value": parse_odds(analysis.get("odds"))}
+
+def numeric_tip_fields(tip: dict) -> dict:
+    stake_min, stake_max = parse_stake_percent(tip.get("stake_suggestion"))
+    return {"total_odds_value": parse_odds(tip.get("total_odds")), "stake_min_percent": stake_min, "stake_max_percent": stake_max}
+
+# (collection, marker field, source fields, function computing the numeric fields)
+NUMERIC_FIELD_MIGRATIONS = [
+    ("analyses", "odds_value", ("odds",), numeric_analysis_fields),
+    ("valuable_tips", "total_odds_value", ("total_odds", "stake_suggestion"), numeric_tip_fields),
+]
+
+numeric_fields_migration = {"done": False, "updated": {name: 0 for name, _, _, _ in NUMERIC_FIELD_MIGRATIONS}}
+
+async def migrate_numeric_fields(time_budget: Optional[float] = None) -> dict:
+    """Fill the numeric fields of documents that predate them, in batches.
+
+    Documents are visited in _id order and only updated if the marker field
+    is still unset and the source fields are unchanged, so edits made by
+    the write routes meanwhile are never overwritten. A null marker next to
+    a text source counts as unset, so values an older parser rejected are
+    parsed again. Stops early once time_budget seconds have passed; the next
+    call picks up the documents still missing the fields.
+    """
+    started_at = time.monotonic()
+    for name, marker, sources, compute in NUMERIC_FIELD_MIGRATIONS:
+        collection = db[name]
+        last_id = None
+        while True:
+            if time_budget is not None and time.monotonic() - started_at >= time_budget:
+                return numeric_fields_migration
+            unset = {"$or": [{marker: {"$exists": False}}, {marker: None, sources[0]: {"$type": "string"}}]}
+            query = dict(unset)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            docs = await collection.find(query, {source: 1 for source in sources}).sort("_id", 1).limit(MIGRATION_BATCH_SIZE).to_list(MIGRATION_BATCH_SIZE)
+            if not docs:
+                break
+            operations = [
+                UpdateOne(
+                    {"_id": doc["_id"], **unset, **{source: doc.get(source) for source in sources}},
+                    {"$set": compute(doc)}
+                )
+                for doc in docs
+            ]
+            result = await collection.bulk_write(operations, ordered=False)
+            numeric_fields_migration["updated"][name] += result.modified_count
+            if result.modified_count:
+                await bump_collection_version(name)
+            last_id = docs[-1]["_id"]
+            await asyncio.sleep(MIGRATION_BATCH_PAUSE)
+    numeric_fields_migration["done"] = True
+    logger.info(f"Numeric fields migration complete: {numeric_fields_migration['updated']}")
+    return numeric_fields_migration
+
+async def migrate_numeric_fields_job():
+    # New documents are written with the numeric fields, so once a pass finds
+    # nothing left this worker never needs to look again
+    if not numeric_fields_migration["done"]:
+        # Leave most of the lease period for renewing the lease
+        await migrate_numeric_fields(time_budget=LEADER_LEASE_SECONDS / 3)
+
+# Daily performance rollups
+# One daily_stats document per (match day, bet type) holds the settled
+# counters and unit-stake returns of the analyses played that day. Write
+# routes apply the difference between an analysis before and after the
+# change, and backfill_daily_stats() rebuilds them from the analyses in one
+# vectorized pass. Charting a year reads ~365 days x bet types documents.
+DAILY_STATS_FIELDS = ("settled", AnalysisResult.GREEN.value, AnalysisResult.RED.value, "priced", "odds_sum", "profit")
+SETTLED_RESULTS = (AnalysisResult.GREEN.value, AnalysisResult.RED.value)
+
+def _day_start(value: datetime) -> datetime:
+    # Mongo stores datetimes in UTC, so an aware value from a request body is
+    # keyed on its UTC day, the one later reads and backfills will see
+    value = _naive_utc(value)
+    return datetime(value.year, value.month, value.day)
+
+def daily_stats_key(day: datetime, bet_type: str) -> str:
+    return f"{day.strftime('%Y-%m-%d')}:{bet_type}"
+
+def daily_stats_delta(old_doc: Optional[dict], new_doc: Optional[dict]) -> dict:
+    """Rollup increments for an analysis changing from old_doc to new_doc.
+
+    Like analysis_stats_delta(), None stands for "does not exist". Only
+    settled analyses count; returns {key: (day, bet_type, increments)}.
+    """
+    delta = {}
+    for doc, sign in ((old_doc, -1), (new_doc, 1)):
+        if doc is None or doc.get("result") not in SETTLED_RESULTS or not isinstance(doc.get("match_date"), datetime):
+            continue
+        day, bet_type, result = _day_start(doc["match_date"]), BetType(doc["bet_type"]).value, AnalysisResult(doc["result"]).value
+        increments = delta.setdefault(daily_stats_key(day, bet_type), (day, bet_type, {}))[2]
+        increments["settled"] = increments.get("settled", 0) + sign
+        increments[result] = increments.get(result, 0) + sign
+        odds = parse_odds(doc.get("odds"))
+        if odds is not None:
+            profit = odds - 1 if result == AnalysisResult.GREEN.value else -1.0
+            increments["priced"] = increments.get("priced", 0) + sign
+            increments["odds_sum"] = increments.get("odds_sum", 0) + sign * odds
+            increments["profit"] = increments.get("profit", 0) + sign * profit
+    return {key: value for key, value in delta.items() if any(value[2].values())}
+
+def merge_daily_stats_delta(total: dict, delta: dict):
+    for key, (day, bet_type, increments) in delta.items():
+        merged = total.setdefault(key, (day, bet_type, {}))[2]
+        for field, value in increments.items():
+            merged[field] = merged.get(field, 0) + value
+
+async def apply_daily_stats_delta(delta: dict):
+    operations = [
+        UpdateOne(
+            {"_id": key},
+            {"$inc": {field: value for field, value in increments.items() if value}, "$setOnInsert": {"day": day, "bet_type": bet_type}},
+            upsert=True
+        )
+        for key, (day, bet_type, increments) in delta.items() if any(increments.values())
+    ]
+    if operations:
+        await db.daily_stats.bulk_write(operations, ordered=False)
+
+async def backfill_daily_stats(days: Optional[set] = None) -> dict:
+    """Rebuild the rollups from the analyses, for the given days or for all.
+
+    The settled analyses are loaded once and grouped with NumPy: one
+    bincount per counter over the (day, bet type) group of every analysis.
+    """
+    query = {"result": {"$in": list(SETTLED_RESULTS)}}
+    scope = {}
+    if days is not None:
+        if not days:
+            return {"analyses": 0, "documents": 0}
+        query["$or"] = [{"match_date": {"$gte": day, "$lt": day + timedelta(days=1)}} for day in days]
+        scope = {"day": {"$in": list(days)}}
+    docs = await db.analyses.find(query, {"_id": 0, "match_date": 1, "bet_type": 1, "result": 1, "odds": 1}).to_list(None)
+    docs = [doc for doc in docs if isinstance(doc.get("match_date"), datetime)]
+    
+    operations = []
+    kept = []
+    if docs:
+        import numpy as np
+        
+        match_days = np.array([doc["match_date"] for doc in docs], dtype="datetime64[D]")
+        bet_types = np.array([BetType(doc["bet_type"]).value for doc in docs])
+        green = np.array([doc["result"] == AnalysisResult.GREEN.value for doc in docs])
+        odds = np.array([parse_odds(doc.get("odds")) or np.nan for doc in docs], dtype=float)
+        
+        keys, groups = np.unique(np.char.add(np.char.add(match_days.astype(str), ":"), bet_types), return_inverse=True)
+        priced = ~np.isnan(odds)
+        profit = np.where(priced, np.where(green, odds - 1, -1.0), 0.0)
+        counters = {
+            "settled": np.bincount(groups, minlength=len(keys)),
+            AnalysisResult.GREEN.value: np.bincount(groups, weights=green, minlength=len(keys)),
+            AnalysisResult.RED.value: np.bincount(groups, weights=~green, minlength=len(keys)),
+            "priced": np.bincount(groups, weights=priced, minlength=len(keys)),
+            "odds_sum": np.bincount(groups, weights=np.where(priced, odds, 0.0), minlength=len(keys)),
+            "profit": np.bincount(groups, weights=profit, minlength=len(keys)),
+        }
+        for i, key in enumerate(keys.tolist()):
+            day, bet_type = key.split(":", 1)
+            document = {"day": datetime.strptime(day, "%Y-%m-%d"), "bet_type": bet_type}
+            for field, values in counters.items():
+                document[field] = float(values[i]) if field in ("odds_sum", "profit") else int(values[i])
+            operations.append(ReplaceOne({"_id": key}, document, upsert=True))
+            kept.append(key)
+    
+    # Drop rollups of days/bet types that no longer have settled analyses
+    operations.insert(0, DeleteMany({**scope, "_id": {"$nin": kept}}))
+    await db.daily_stats.bulk_write(operations, ordered=True)
+    return {"analyses": len(docs), "documents": len(kept)}
+
+# Confidence calibration
+# Compares each settled analysis' confidence (read as the probability of a
+# green) with its outcome. Only the two needed fields are loaded, as NumPy
+# columns, and every statistic is computed on those arrays.
+CALIBRATION_EPSILON = 1e-6
+
+async def load_calibration_columns(query: dict):
+    docs = await public_db.analyses.find(
+        {"$and": [query, {"result": {"$in": list(SETTLED_RESULTS)}}]}, {"_id": 0, "confidence": 1, "result": 1}
+    ).to_list(None)
+    import numpy as np
+    
+    confidence = np.fromiter((doc.get("confidence") or 0 for doc in docs), dtype=float, count=len(docs))
+    outcome = np.fromiter((doc["result"] == AnalysisResult.GREEN.value for doc in docs), dtype=float, count=len(docs))
+    return np.clip(confidence / 100, 0, 1), outcome
+
+def calibration_report(probability: "np.ndarray", outcome: "np.ndarray", bucket_count: int) -> dict:
+    """Brier score, log-loss and reliability buckets for predicted probabilities."""
+    import numpy as np
+    
+    total = len(probability)
+    if total == 0:
+        return {"settled": 0, "brier_score": None, "log_loss": None, "expected_calibration_error": None, "buckets": []}
+    
+    clipped = np.clip(probability, CALIBRATION_EPSILON, 1 - CALIBRATION_EPSILON)
+    # Bucket i covers [i, i + 1) / bucket_count. Rounding before the floor
+    # absorbs the float error of confidence / 100, so whole percentages on an
+    # edge open their bucket (0.7 * 10 is 7.000000000000001, 0.29 * 100 is
+    # 28.999999999999996); 100 joins the last bucket.
+    bucket = np.minimum(np.floor(np.round(probability * bucket_count, 9)).astype(int), bucket_count - 1)
+    counts = np.bincount(bucket, minlength=bucket_count)
+    predicted = np.bincount(bucket, weights=probability, minlength=bucket_count)
+    observed = np.bincount(bucket, weights=outcome, minlength=bucket_count)
+    filled = counts > 0
+    mean_predicted = np.divide(predicted, counts, out=np.zeros(bucket_count), where=filled)
+    hit_rate = np.divide(observed, counts, out=np.zeros(bucket_count), where=filled)
+    
+    base_rate = outcome.mean()
+    return {
+        "settled": total,
+        "base_rate": round(float(base_rate), 4),
+        "brier_score": round(float(np.mean((probability - outcome) ** 2)), 4),
+        # Brier score of always predicting the base rate; lower is better than it
+        "reference_brier_score": round(float(base_rate * (1 - base_rate)), 4),
+        "log_loss": round(float(-np.mean(outcome * np.log(clipped) + (1 - outcome) * np.log(1 - clipped))), 4),
+        "expected_calibration_error": round(float(np.sum(counts / total * np.abs(hit_rate - mean_predicted))), 4),
+        "buckets": [
+            {
+                "min_confidence": round(i * 100 / bucket_count, 2),
+                "max_confidence": round((i + 1) * 100 / bucket_count, 2),
+                "count": int(counts[i]),
+                "mean_confidence": round(float(mean_predicted[i] * 100), 2),
+                "hit_rate": round(float(hit_rate[i] * 100), 2),
+            }
+            for i in range(bucket_count) if filled[i]
+        ],
+    }
+
+async def build_calibration(filters: dict, bucket_count: int):
+    probability, outcome = await load_calibration_columns(filters)
+    return pydantic_core.to_json(calibration_report(probability, outcome, bucket_count)), {}
+
+# Leader lease and background jobs
+class LeaderLease:
+    """Mongo-backed lease that at most one worker holds at a time."""
+
+    def __init__(self, name: str, owner: str, ttl: float):
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+        self.is_leader = False
+
+    async def acquire(self) -> bool:
+        """Take the lease if it is free or expired, or renew it if we hold it."""
+        # Expiry is set and checked against Mongo's clock ($$NOW), so skew
+        # between worker hosts cannot make a live lease look expired
+        try:
+            await db.leases.update_one(
+                {"_id": self.name, "$expr": {"$or": [{"$eq": ["$owner", self.owner]}, {"$lt": ["$expires_at", "$$NOW"]}]}},
+                [{"$set": {"owner": self.owner, "expires_at": {"$add": ["$$NOW", int(self.ttl * 1000)]}}}],
+                upsert=True
+            )
+            self.is_leader = True
+        except DuplicateKeyError:
+            # Held by another live worker: the filter missed and the upsert collided
+            self.is_leader = False
+        return self.is_leader
+
+    async def release(self):
+        if self.is_leader:
+            await db.leases.delete_one({"_id": self.name, "owner": self.owner})
+            self.is_leader = False
+
+    def stats(self) -> dict:
+        return {"name": self.name, "owner": self.owner, "ttl": self.ttl, "is_leader": self.is_leader}
+
+async def reconcile_stats_job():
+    await reconcile_analysis_stats()
+
+daily_stats_seed = {"done": False}
+
+async def seed_daily_stats_job():
+    # A database that predates the rollups gets one full backfill. After that,
+    # or when nothing is settled yet, the write routes keep them current.
+    if daily_stats_seed["done"]:
+        return
+    if await db.daily_stats.find_one({}) is None and await db.analyses.find_one({"result": {"$in": list(SETTLED_RESULTS)}}):
+        await backfill_daily_stats()
+    daily_stats_seed["done"] = True
+
+# (name, interval in seconds, coroutine function)
+BACKGROUND_JOBS = [
+    ("reconcile_analysis_stats", STATS_RECONCILE_INTERVAL, reconcile_stats_job),
+    ("seed_daily_stats", 0, seed_daily_stats_job),
+    ("migrate_numeric_fields", 0, migrate_numeric_fields_job),
+]
+
+background_lease = LeaderLease("background-jobs", WORKER_ID, LEADER_LEASE_SECONDS)
+
+async def run_background_jobs(lease: LeaderLease):
+    last_run = {}
     while True:
         try:
-            current_time = datetime.utcnow()
-            result = await db.users.delete_many({
-                "role": {"$ne": UserRole.ADMIN},
-                "expires_at": {"$lt": current_time}
-            })
-            if result.deleted_count > 0:
-                logging.info(f"Cleaned up {result.deleted_count} expired users")
+            if await lease.acquire():
+                for name, interval, job in BACKGROUND_JOBS:
+                    now = time.monotonic()
+                    if name in last_run and now - last_run[name] < interval:
+                        continue
+                    last_run[name] = now
+                    try:
+                        await job()
+                    except Exception as e:
+                        logger.error(f"Error running background job {name}: {e}")
+            else:
+                # A worker that later takes over runs every job right away
+                last_run.clear()
         except Exception as e:
-            logging.error(f"Error cleaning expired users: {e}")
+            logger.error(f"Error renewing background jobs lease: {e}")
         
-        # Wait 1 hour before next cleanup
-        await asyncio.sleep(3600)
+        await asyncio.sleep(lease.ttl / 3)
+
+background_tasks = []
 
 # Routes
 @api_router.get("/")
@@ -227,19 +2096,24 @@ async def register(user_data: UserCreate):
     
     # Create user with 31-day expiration
     user_dict = user_data.dict()
-    user_dict["password_hash"] = hash_password(user_data.password)
+    user_dict["password_hash"] = await password_hasher.hash(user_data.password)
     user_dict["expires_at"] = datetime.utcnow() + timedelta(days=31)
     del user_dict["password"]
     
     user = User(**user_dict)
-    await db.users.insert_one(user.dict())
+    try:
+        await db.users.insert_one(user.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Usuário ou email já existe")
     
     return {"message": "Usuário registrado com sucesso. Aguarde aprovação do administrador."}
 
 @api_router.post("/auth/login", response_model=Token)
-async def login(user_data: UserLogin):
+async def login(user_data: UserLogin, request: Request):
+    await check_login_throttle(request, user_data.username)
+    
     user = await db.users.find_one({"username": user_data.username})
-    if not user or not verify_password(user_data.password, user["password_hash"]):
+    if not user or not await password_hasher.verify(user_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
     
     if not user["is_active"] or not user["approved_by_admin"]:
@@ -253,6 +2127,7 @@ async def login(user_data: UserLogin):
         if datetime.utcnow() > expires_at:
             # Delete expired user
             await db.users.delete_one({"id": user["id"]})
+            await invalidate_cached_users([user["id"]])
             raise HTTPException(status_code=401, detail="Conta expirada")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -282,15 +2157,16 @@ async def change_password(
     
     # Get user from database to verify current password
     user_doc = await db.users.find_one({"id": current_user.id})
-    if not user_doc or not verify_password(current_password, user_doc["password_hash"]):
+    if not user_doc or not await password_hasher.verify(current_password, user_doc["password_hash"]):
         raise HTTPException(status_code=400, detail="Senha atual incorreta")
     
     # Update password
-    new_password_hash = hash_password(new_password)
+    new_password_hash = await password_hasher.hash(new_password)
     await db.users.update_one(
         {"id": current_user.id},
         {"$set": {"password_hash": new_password_hash}}
     )
+    await invalidate_cached_users([current_user.id])
     
     return {"message": "Senha alterada com sucesso"}
 
@@ -305,8 +2181,14 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 # Admin routes
 @api_router.get("/admin/users", response_model=List[dict])
-async def get_users(admin_user: User = Depends(get_admin_user)):
-    users = await db.users.find().to_list(1000)
+async def get_users(
+    response: Response,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    admin_user: User = Depends(get_admin_user)
+):
+    users, next_cursor = await fetch_page(db.users, {}, limit, cursor)
+    set_next_cursor(response, next_cursor)
     return [{"id": u["id"], "username": u["username"], "email": u["email"], 
              "role": u["role"], "is_active": u["is_active"], 
              "approved_by_admin": u["approved_by_admin"], "created_at": u["created_at"],
@@ -321,14 +2203,17 @@ async def admin_create_user(user_data: AdminUserCreate, admin_user: User = Depen
     
     # Create user
     user_dict = user_data.dict()
-    user_dict["password_hash"] = hash_password(user_data.password)
+    user_dict["password_hash"] = await password_hasher.hash(user_data.password)
     # Set expiration for non-admin users
     if user_data.role != UserRole.ADMIN:
         user_dict["expires_at"] = datetime.utcnow() + timedelta(days=31)
     del user_dict["password"]
     
     user = User(**user_dict)
-    await db.users.insert_one(user.dict())
+    try:
+        await db.users.insert_one(user.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Usuário ou email já existe")
     
     return {"message": "Usuário criado com sucesso pelo administrador."}
 
@@ -338,6 +2223,7 @@ async def approve_user(user_id: str, admin_user: User = Depends(get_admin_user))
         {"id": user_id},
         {"$set": {"approved_by_admin": True, "is_active": True}}
     )
+    await invalidate_cached_users([user_id])
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return {"message": "Usuário aprovado com sucesso"}
@@ -348,6 +2234,7 @@ async def deactivate_user(user_id: str, admin_user: User = Depends(get_admin_use
         {"id": user_id},
         {"$set": {"is_active": False}}
     )
+    await invalidate_cached_users([user_id])
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return {"message": "Usuário desativado com sucesso"}
@@ -359,59 +2246,253 @@ async def delete_user(user_id: str, admin_user: User = Depends(get_admin_user)):
         raise HTTPException(status_code=400, detail="Não é possível deletar sua própria conta")
     
     result = await db.users.delete_one({"id": user_id})
+    await invalidate_cached_users([user_id])
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return {"message": "Usuário deletado com sucesso"}
 
+# Bulk user administration
+def user_batch_query(batch: UserBatch) -> dict:
+    """Translate a UserBatch into a users query.
+
+    Explicit ids are matched as given. Filters only ever select regular
+    users, so a broad filter cannot touch admin accounts.
+    """
+    if (batch.ids is None) == (batch.filter is None):
+        raise HTTPException(status_code=400, detail="Informe ids ou filter")
+    if batch.ids is not None:
+        if not batch.ids or len(batch.ids) > MAX_USER_BATCH:
+            raise HTTPException(status_code=400, detail=f"Informe de 1 a {MAX_USER_BATCH} ids")
+        return {"id": {"$in": batch.ids}}
+    
+    query = {"role": UserRole.USER.value}
+    for field in ("approved_by_admin", "is_active"):
+        value = getattr(batch.filter, field)
+        if value is not None:
+            query[field] = value
+    created_at = {}
+    if batch.filter.created_before is not None:
+        created_at["$lt"] = batch.filter.created_before
+    if batch.filter.created_after is not None:
+        created_at["$gte"] = batch.filter.created_after
+    if created_at:
+        query["created_at"] = created_at
+    if len(query) == 1:
+        raise HTTPException(status_code=400, detail="Filtro vazio")
+    return query
+
+@api_router.post("/admin/users/approve")
+async def approve_users(batch: UserBatch, admin_user: User = Depends(get_admin_user)):
+    result = await db.users.update_many(
+        user_batch_query(batch),
+        {"$set": {"approved_by_admin": True, "is_active": True}}
+    )
+    await invalidate_cached_users(batch.ids)
+    return {"matched": result.matched_count, "modified": result.modified_count}
+
+@api_router.post("/admin/users/deactivate")
+async def deactivate_users(batch: UserBatch, admin_user: User = Depends(get_admin_user)):
+    result = await db.users.update_many(
+        user_batch_query(batch),
+        {"$set": {"is_active": False}}
+    )
+    await invalidate_cached_users(batch.ids)
+    return {"matched": result.matched_count, "modified": result.modified_count}
+
+@api_router.post("/admin/users/delete")
+async def delete_users(batch: UserBatch, admin_user: User = Depends(get_admin_user)):
+    # Prevent admin from deleting themselves
+    if batch.ids is not None and admin_user.id in batch.ids:
+        raise HTTPException(status_code=400, detail="Não é possível deletar sua própria conta")
+    
+    query = user_batch_query(batch)
+    result = await db.users.delete_many({"$and": [query, {"id": {"$ne": admin_user.id}}]})
+    await invalidate_cached_users(batch.ids)
+    return {"deleted": result.deleted_count}
+
+@api_router.get("/admin/diagnostics")
+async def get_diagnostics(admin_user: User = Depends(get_admin_user)):
+    return {
+        "password_hasher": password_hasher.stats(),
+        "user_cache": user_cache.stats(),
+        "login_throttle": {scope: limiter.stats() for scope, limiter in login_limiters.items()},
+        "indexes": index_report,
+        "event_stream": event_broker.stats(),
+        "response_cache": response_cache.stats(),
+        "background_jobs": background_lease.stats(),
+        "numeric_fields_migration": numeric_fields_migration,
+        "mongo_pool": pool_monitor.stats(),
+        "event_loop": loop_monitor.stats(),
+        "startup_timings": startup_timings
+    }
+
+@api_router.get("/admin/diagnostics/slow")
+async def get_slow_operations(admin_user: User = Depends(get_admin_user)):
+    return {
+        "event_loop": loop_monitor.stats(),
+        "offenders": loop_monitor.worst_offenders()
+    }
+
+@api_router.post("/admin/stats/reconcile")
+async def reconcile_statistics(admin_user: User = Depends(get_admin_user)):
+    return await reconcile_analysis_stats()
+
+@api_router.post("/admin/migrations/numeric-fields")
+async def run_numeric_fields_migration(admin_user: User = Depends(get_admin_user)):
+    return await migrate_numeric_fields()
+
+@api_router.post("/admin/stats/rollups/backfill")
+async def backfill_statistics_rollups(admin_user: User = Depends(get_admin_user)):
+    report = await backfill_daily_stats()
+    await bump_collection_version("analyses")
+    return report
+
 # Analysis routes
 @api_router.post("/admin/analysis", response_model=Analysis)
 async def create_analysis(analysis_data: AnalysisCreate, admin_user: User = Depends(get_admin_user)):
-    analysis = Analysis(**analysis_data.dict())
+    analysis = Analysis(**analysis_data.dict(), **numeric_analysis_fields(analysis_data.dict()))
     await db.analyses.insert_one(analysis.dict())
+    await increment_analysis_stats(analysis_stats_delta(None, analysis.result))
+    await bump_collection_version("analyses")
+    await event_broker.publish("analysis.created", analysis_event_data(analysis))
     return analysis
 
 @api_router.get("/admin/analysis", response_model=List[Analysis])
-async def get_admin_analyses(admin_user: User = Depends(get_admin_user)):
-    analyses = await db.analyses.find().sort("created_at", -1).to_list(1000)
-    return [Analysis(**analysis) for analysis in analyses]
+async def get_admin_analyses(
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    filters: dict = Depends(analysis_filters),
+    admin_user: User = Depends(get_admin_user)
+):
+    analyses, next_cursor = await fetch_page(db.analyses, filters, limit, cursor, projection={"_id": 0})
+    return json_list_response(ANALYSIS_LIST, analyses, next_cursor)
 
 @api_router.put("/admin/analysis/{analysis_id}", response_model=Analysis)
 async def update_analysis(analysis_id: str, analysis_update: AnalysisUpdate, admin_user: User = Depends(get_admin_user)):
     update_dict = {k: v for k, v in analysis_update.dict().items() if v is not None}
+    if "odds" in update_dict:
+        update_dict.update(numeric_analysis_fields(update_dict))
     
-    result = await db.analyses.update_one(
+    previous_analysis = await db.analyses.find_one_and_update(
         {"id": analysis_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if previous_analysis is None:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
     
-    updated_analysis = await db.analyses.find_one({"id": analysis_id})
-    return Analysis(**updated_analysis)
+    updated_analysis = Analysis(**{**previous_analysis, **update_dict})
+    if "result" in update_dict:
+        await increment_analysis_stats(analysis_stats_delta(previous_analysis.get("result", AnalysisResult.PENDING), updated_analysis.result))
+    await apply_daily_stats_delta(daily_stats_delta(previous_analysis, updated_analysis.dict()))
+    await bump_collection_version("analyses")
+    await event_broker.publish("analysis.updated", analysis_event_data(updated_analysis))
+    return updated_analysis
+
+@api_router.post("/admin/analysis/settle")
+async def settle_analyses(settlements: List[AnalysisSettlement], admin_user: User = Depends(get_admin_user)):
+    if len(settlements) > MAX_SETTLEMENT_BATCH:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_SETTLEMENT_BATCH} análises por lote")
+    requested = {item.id: item.result.value for item in settlements}
+    if len(requested) != len(settlements):
+        raise HTTPException(status_code=400, detail="Análise repetida no lote")
+    
+    current_docs = {
+        doc["id"]: doc
+        for doc in await db.analyses.find(
+            {"id": {"$in": list(requested)}},
+            {"_id": 0, "id": 1, "result": 1, "match_date": 1, "bet_type": 1, "odds": 1}
+        ).to_list(len(requested))
+    }
+    current = {analysis_id: doc.get("result", AnalysisResult.PENDING.value) for analysis_id, doc in current_docs.items()}
+    outcomes = {}
+    operations = []
+    changed = []
+    delta = {}
+    rollup_delta = {}
+    for analysis_id, result in requested.items():
+        if analysis_id not in current:
+            outcomes[analysis_id] = "not_found"
+        elif current[analysis_id] == result:
+            outcomes[analysis_id] = "unchanged"
+        else:
+            # Filtering on the previous result keeps the stats delta exact even
+            # if another request settles the same analysis concurrently
+            operations.append(UpdateOne({"id": analysis_id, "result": current[analysis_id]}, {"$set": {"result": result}}))
+            changed.append(analysis_id)
+            for field, value in analysis_stats_delta(current[analysis_id], result).items():
+                delta[field] = delta.get(field, 0) + value
+            merge_daily_stats_delta(rollup_delta, daily_stats_delta(current_docs[analysis_id], {**current_docs[analysis_id], "result": result}))
+            outcomes[analysis_id] = "updated"
+    
+    if operations:
+        write_result = await db.analyses.bulk_write(operations, ordered=False)
+        if write_result.matched_count == len(operations):
+            await increment_analysis_stats({field: value for field, value in delta.items() if value})
+            await apply_daily_stats_delta(rollup_delta)
+        else:
+            # Some analyses changed under us: report them and recount the stats
+            latest = {
+                doc["id"]: doc.get("result")
+                for doc in await db.analyses.find({"id": {"$in": changed}}, {"_id": 0, "id": 1, "result": 1}).to_list(len(changed))
+            }
+            for analysis_id in changed:
+                if latest.get(analysis_id) != requested[analysis_id]:
+                    outcomes[analysis_id] = "conflict"
+            await reconcile_analysis_stats()
+            await backfill_daily_stats({day for day, _, _ in rollup_delta.values()})
+        await bump_collection_version("analyses")
+        await event_broker.publish("analysis.settled", {
+            "items": [{"id": analysis_id, "result": requested[analysis_id]} for analysis_id, outcome in outcomes.items() if outcome == "updated"]
+        })
+    
+    summary = {}
+    for outcome in outcomes.values():
+        summary[outcome] = summary.get(outcome, 0) + 1
+    return {
+        "results": [{"id": analysis_id, "result": requested[analysis_id], "status": outcome} for analysis_id, outcome in outcomes.items()],
+        "summary": summary
+    }
 
 @api_router.delete("/admin/analysis/{analysis_id}")
 async def delete_analysis(analysis_id: str, admin_user: User = Depends(get_admin_user)):
-    result = await db.analyses.delete_one({"id": analysis_id})
-    if result.deleted_count == 0:
+    deleted_analysis = await db.analyses.find_one_and_delete(
+        {"id": analysis_id}, projection={"result": 1, "match_date": 1, "bet_type": 1, "odds": 1}
+    )
+    if deleted_analysis is None:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
+    await increment_analysis_stats(analysis_stats_delta(deleted_analysis.get("result", AnalysisResult.PENDING), None))
+    await apply_daily_stats_delta(daily_stats_delta(deleted_analysis, None))
+    await bump_collection_version("analyses")
+    await event_broker.publish("analysis.deleted", {"id": analysis_id})
     return {"message": "Análise deletada com sucesso"}
 
 # Public routes (for approved users)
 # Valuable Tips routes
 @api_router.post("/admin/valuable-tips", response_model=ValuableTip)
 async def create_valuable_tip(tip_data: ValuableTipCreate, admin_user: User = Depends(get_admin_user)):
-    tip = ValuableTip(**tip_data.dict())
+    tip = ValuableTip(**tip_data.dict(), **numeric_tip_fields(tip_data.dict()))
     await db.valuable_tips.insert_one(tip.dict())
+    await bump_collection_version("valuable_tips")
+    await event_broker.publish("valuable_tip.created", tip.model_dump(mode="json"))
     return tip
 
 @api_router.get("/admin/valuable-tips", response_model=List[ValuableTip])
-async def get_admin_valuable_tips(admin_user: User = Depends(get_admin_user)):
-    tips = await db.valuable_tips.find().sort("created_at", -1).to_list(1000)
-    return [ValuableTip(**tip) for tip in tips]
+async def get_admin_valuable_tips(
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    admin_user: User = Depends(get_admin_user)
+):
+    tips, next_cursor = await fetch_page(db.valuable_tips, {}, limit, cursor, projection={"_id": 0})
+    return json_list_response(VALUABLE_TIP_LIST, tips, next_cursor)
 
 @api_router.put("/admin/valuable-tips/{tip_id}", response_model=ValuableTip)
 async def update_valuable_tip(tip_id: str, tip_update: ValuableTipUpdate, admin_user: User = Depends(get_admin_user)):
     update_dict = {k: v for k, v in tip_update.dict().items() if v is not None}
+    if "total_odds" in update_dict:
+        update_dict["total_odds_value"] = numeric_tip_fields(update_dict)["total_odds_value"]
+    if "stake_suggestion" in update_dict:
+        update_dict["stake_min_percent"], update_dict["stake_max_percent"] = parse_stake_percent(update_dict["stake_suggestion"])
     
     result = await db.valuable_tips.update_one(
         {"id": tip_id},
@@ -420,54 +2501,233 @@ async def update_valuable_tip(tip_id: str, tip_update: ValuableTipUpdate, admin_
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Palpite valioso não encontrado")
     
-    updated_tip = await db.valuable_tips.find_one({"id": tip_id})
-    return ValuableTip(**updated_tip)
+    await bump_collection_version("valuable_tips")
+    updated_tip = ValuableTip(**await db.valuable_tips.find_one({"id": tip_id}))
+    await event_broker.publish("valuable_tip.updated", updated_tip.model_dump(mode="json"))
+    return updated_tip
 
 @api_router.delete("/admin/valuable-tips/{tip_id}")
 async def delete_valuable_tip(tip_id: str, admin_user: User = Depends(get_admin_user)):
     result = await db.valuable_tips.delete_one({"id": tip_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Palpite valioso não encontrado")
+    await bump_collection_version("valuable_tips")
+    await event_broker.publish("valuable_tip.deleted", {"id": tip_id})
     return {"message": "Palpite valioso deletado com sucesso"}
 
 # Public routes (for approved users)
+async def build_public_valuable_tips():
+    tips = await public_db.valuable_tips.find({}, {"_id": 0}).sort(PAGE_SORT).limit(10).to_list(10)
+    return VALUABLE_TIP_LIST.dump_json(VALUABLE_TIP_LIST.validate_python(tips)), {}
+
+async def build_public_analyses(limit: int, cursor: Optional[str], filters: Optional[dict] = None):
+    # Summaries only; the full text is served by GET /analysis/{analysis_id}
+    analyses, next_cursor = await fetch_page(public_db.analyses, filters or {}, limit, cursor, projection=ANALYSIS_SUMMARY_PROJECTION)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return ANALYSIS_SUMMARY_LIST.dump_json(ANALYSIS_SUMMARY_LIST.validate_python(analyses)), headers
+
 @api_router.get("/valuable-tips", response_model=List[ValuableTip])
-async def get_public_valuable_tips(current_user: User = Depends(get_current_user)):
-    tips = await db.valuable_tips.find().sort("created_at", -1).limit(10).to_list(10)
-    return [ValuableTip(**tip) for tip in tips]
+async def get_public_valuable_tips(request: Request, current_user: User = Depends(get_current_user)):
+    return await cached_json_response(request, ("valuable_tips",), build_public_valuable_tips)
+
+@api_router.get("/analysis", response_model=List[AnalysisSummary])
+async def get_public_analyses(
+    request: Request,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    filters: dict = Depends(analysis_filters),
+    current_user: User = Depends(get_current_user)
+):
+    # Filters are part of the query string, so each combination is cached separately
+    return await cached_json_response(request, ("analyses",), lambda: build_public_analyses(limit, cursor, filters))
+
+# Relevance first, newest first among equal scores
+SEARCH_SORT = [("score", {"$meta": "textScore"}), ("created_at", -1), ("id", -1)]
 
-@api_router.get("/analysis", response_model=List[Analysis])
-async def get_public_analyses(current_user: User = Depends(get_current_user)):
-    analyses = await db.analyses.find().sort("created_at", -1).limit(50).to_list(50)
-    return [Analysis(**analysis) for analysis in analyses]
+@api_router.get("/analysis/search", response_model=List[AnalysisSummary])
+async def search_analyses(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=SEARCH_QUERY_MAX_LENGTH),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    filters: dict = Depends(analysis_filters),
+    current_user: User = Depends(get_current_user)
+):
+    # The text index yields only the matching documents, so the cost follows
+    # the number of matches. Results are not kept in the response cache, where
+    # one-off queries would push out the hot list pages, but they get ETags.
+    etag = make_etag(request, await get_collection_versions("analyses"))
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    limit = min(limit, MAX_SEARCH_RESULTS - offset)
+    if limit <= 0:
+        return Response(content=b"[]", media_type="application/json", headers=etag_headers(etag))
+    
+    projection = {**ANALYSIS_SUMMARY_PROJECTION, "score": {"$meta": "textScore"}}
+    analyses = await (
+        public_db.analyses.find({"$text": {"$search": q}, **filters}, projection)
+        .sort(SEARCH_SORT).skip(offset).limit(limit + 1).to_list(limit + 1)
+    )
+    more = len(analyses) > limit and offset + limit < MAX_SEARCH_RESULTS
+    next_cursor = encode_offset_cursor(offset + limit) if more else None
+    
+    response = json_list_response(ANALYSIS_SUMMARY_LIST, analyses[:limit], next_cursor)
+    response.headers.update(etag_headers(etag))
+    return response
+
+@api_router.get("/analysis/{analysis_id}", response_model=Analysis)
+async def get_public_analysis(analysis_id: str, request: Request, response: Response, current_user: User = Depends(get_current_user)):
+    not_modified = await check_not_modified(request, response, "analyses")
+    if not_modified:
+        return not_modified
+    
+    analysis = await public_db.analyses.find_one({"id": analysis_id}, {"_id": 0})
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Análise não encontrada")
+    return analysis
 
 @api_router.get("/stats")
-async def get_statistics(current_user: User = Depends(get_current_user)):
-    # Analysis stats
-    total_analyses = await db.analyses.count_documents({})
-    green_analyses = await db.analyses.count_documents({"result": AnalysisResult.GREEN})
-    red_analyses = await db.analyses.count_documents({"result": AnalysisResult.RED})
+async def get_statistics(request: Request, response: Response, current_user: User = Depends(get_current_user)):
+    not_modified = await check_not_modified(request, response, "analyses")
+    if not_modified:
+        return not_modified
+    
+    stats = await public_db.stats.find_one({"_id": ANALYSIS_STATS_ID})
+    if stats is None:
+        stats = (await reconcile_analysis_stats())["after"]
     
+    green_analyses = stats.get(AnalysisResult.GREEN.value, 0)
+    red_analyses = stats.get(AnalysisResult.RED.value, 0)
     accuracy = (green_analyses / (green_analyses + red_analyses) * 100) if (green_analyses + red_analyses) > 0 else 0
     
-    return {
-        "total_analyses": total_analyses,
+    # Returned as a response so the polled route skips jsonable_encoder; the
+    # ETag headers set on response are carried over explicitly
+    return FastJSONResponse({
+        "total_analyses": stats.get("total", 0),
         "green": green_analyses,
         "red": red_analyses,
-        "pending": total_analyses - green_analyses - red_analyses,
+        "pending": stats.get(AnalysisResult.PENDING.value, 0),
         "accuracy": round(accuracy, 2)
+    }, headers=dict(response.headers))
+
+class TimeseriesGranularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+def _period_start(day: datetime, granularity: TimeseriesGranularity) -> datetime:
+    if granularity == TimeseriesGranularity.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == TimeseriesGranularity.MONTH:
+        return day.replace(day=1)
+    return day
+
+def performance_summary(counters: dict) -> dict:
+    settled, priced = counters.get("settled", 0), counters.get("priced", 0)
+    green = counters.get(AnalysisResult.GREEN.value, 0)
+    return {
+        "settled": settled,
+        "green": green,
+        "red": counters.get(AnalysisResult.RED.value, 0),
+        "accuracy": round(green / settled * 100, 2) if settled else 0,
+        "roi": round(counters.get("profit", 0) / priced * 100, 2) if priced else None,
+        "profit": round(counters.get("profit", 0), 4),
+        "average_odds": round(counters.get("odds_sum", 0) / priced, 3) if priced else None,
     }
 
+async def build_stats_timeseries(start: datetime, end: datetime, granularity: TimeseriesGranularity, bet_type: Optional[BetType]):
+    # Rollups emptied by deletions keep zero counters until the next backfill
+    query = {"day": {"$gte": start, "$lte": end}, "settled": {"$gt": 0}}
+    if bet_type is not None:
+        query["bet_type"] = bet_type.value
+    
+    periods = {}
+    async for doc in public_db.daily_stats.find(query, {"_id": 0}).sort("day", 1):
+        period = periods.setdefault(_period_start(doc["day"], granularity), {"total": {}, "by_bet_type": {}})
+        for counters in (period["total"], period["by_bet_type"].setdefault(doc["bet_type"], {})):
+            for field in DAILY_STATS_FIELDS:
+                counters[field] = counters.get(field, 0) + doc.get(field, 0)
+    
+    series = [
+        {
+            "period": period_start.date().isoformat(),
+            **performance_summary(period["total"]),
+            "by_bet_type": {name: performance_summary(counters) for name, counters in period["by_bet_type"].items()},
+        }
+        for period_start, period in periods.items()
+    ]
+    body = {"granularity": granularity.value, "start": start.date().isoformat(), "end": end.date().isoformat(), "series": series}
+    return pydantic_core.to_json(body), {}
+
+@api_router.get("/stats/timeseries")
+async def get_statistics_timeseries(
+    request: Request,
+    granularity: TimeseriesGranularity = TimeseriesGranularity.DAY,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bet_type: Optional[BetType] = None,
+    current_user: User = Depends(get_current_user)
+):
+    # Days are match days; stakes are one unit per priced analysis, so ROI is
+    # profit over priced analyses
+    end = _day_start(_naive_utc(end) or datetime.utcnow())
+    start = _day_start(_naive_utc(start) or end - timedelta(days=TIMESERIES_DEFAULT_DAYS - 1))
+    if start > end or (end - start).days >= TIMESERIES_MAX_DAYS:
+        raise HTTPException(status_code=400, detail="Intervalo de datas inválido")
+    # The window defaults to the current day, so the resolved bounds are part
+    # of the cache key and ETag; yesterday's body must not be served today
+    window = f"{granularity.value}.{start.date().isoformat()}.{end.date().isoformat()}"
+    return await cached_json_response(
+        request, ("analyses",), lambda: build_stats_timeseries(start, end, granularity, bet_type), variant=window
+    )
+
+@api_router.get("/stats/calibration")
+async def get_statistics_calibration(
+    request: Request,
+    buckets: int = Query(10, ge=2, le=20),
+    filters: dict = Depends(analysis_filters),
+    current_user: User = Depends(get_current_user)
+):
+    # Settlements bump the analyses version, which invalidates the cached report
+    return await cached_json_response(request, ("analyses",), lambda: build_calibration(filters, buckets))
+
+@api_router.post("/stream/ticket")
+async def get_stream_ticket(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = decode_token(credentials.credentials)
+    current_user = await load_token_user(payload["sub"])
+    return {"ticket": create_stream_ticket(current_user.id, payload["exp"]), "expires_in": STREAM_TICKET_SECONDS}
+
+@api_router.get("/stream")
+async def stream_events(session: tuple = Depends(get_stream_session)):
+    current_user, session_expires_at = session
+    event_broker.check_capacity()
+    return StreamingResponse(
+        event_stream(current_user.id, session_expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Não autenticado")
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
@@ -476,26 +2736,144 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Health checks and warm-up
+class ReadinessProbe:
+    """Readiness state with a cached Mongo ping.
+
+    Probes arriving together share one ping, and its result is reused for
+    READINESS_CACHE_SECONDS so frequent probing costs no extra round trips.
+    """
+
+    def __init__(self, cache_seconds: float, ping_timeout: float):
+        self.cache_seconds = cache_seconds
+        self.ping_timeout = ping_timeout
+        self.warmed_up = False
+        self.warm_up_error = None
+        self._checked_at = None
+        self._mongo_ok = False
+        self._error = None
+        self._lock = None
+
+    async def check(self) -> dict:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.cache_seconds:
+                try:
+                    await asyncio.wait_for(db.command("ping"), timeout=self.ping_timeout)
+                    self._mongo_ok, self._error = True, None
+                except Exception as e:
+                    self._mongo_ok, self._error = False, str(e) or type(e).__name__
+                self._checked_at = time.monotonic()
+        return {
+            "ready": self.warmed_up and self._mongo_ok,
+            "warmed_up": self.warmed_up,
+            "warm_up_error": self.warm_up_error,
+            "mongo": "ok" if self._mongo_ok else self._error,
+        }
+
+readiness = ReadinessProbe(READINESS_CACHE_SECONDS, READINESS_PING_TIMEOUT)
+startup_timings = {}
+
+async def warm_up():
+    """Open pool connections and fill the hot caches before reporting ready."""
+    started_at = time.perf_counter()
+    while True:
+        try:
+            # Stats documents are rebuilt by the background jobs lease holder
+            # only; /stats reconciles on demand until the first run lands
+            await asyncio.gather(*[db.command("ping") for _ in range(MONGO_WARMUP_CONNECTIONS)])
+            await load_cached_response(
+                ("/api/analysis", "", ""), await get_collection_versions("analyses"),
+                lambda: build_public_analyses(PAGE_SIZE, None)
+            )
+            await load_cached_response(
+                ("/api/valuable-tips", "", ""), await get_collection_versions("valuable_tips"),
+                build_public_valuable_tips
+            )
+            break
+        except Exception as e:
+            # Stay unready, with the reason in /readyz, and try again
+            readiness.warm_up_error = str(e) or type(e).__name__
+            logger.error(f"Error warming up, retrying in {WARMUP_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+    
+    startup_timings["warm_up"] = round(time.perf_counter() - started_at, 4)
+    readiness.warmed_up, readiness.warm_up_error = True, None
+    logger.info(f"Startup timings (s): {startup_timings}")
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    # Liveness only: the process is up and the event loop is responsive
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    state = await readiness.check()
+    return FastJSONResponse(state, status_code=200 if state["ready"] else 503)
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED_AT
+
 @app.on_event("startup")
 async def startup_event():
-    # Create admin user if it doesn't exist
+    startup_timings["import"] = round(IMPORT_SECONDS, 4)
+    if LOGIN_PROXY_HOPS is None:
+        logger.warning("LOGIN_PROXY_HOPS is not set: per-IP login throttling is disabled")
+    started_at = time.perf_counter()
+    
+    # Make sure indexes (including the expired-user TTL index) exist
+    index_report.update(await ensure_indexes())
+    startup_timings["indexes"] = round(time.perf_counter() - started_at, 4)
+    
+    # Create admin user if it doesn't exist. The upsert on the unique username
+    # index makes this safe when several workers start at the same time.
     admin_user = await db.users.find_one({"role": UserRole.ADMIN})
     if not admin_user:
         admin_data = {
             "username": "admin",
             "email": "admin@nucleobets.com",
-            "password_hash": hash_password("admin123"),
+            "password_hash": await password_hasher.hash("admin123"),
             "role": UserRole.ADMIN,
             "is_active": True,
             "approved_by_admin": True
         }
         admin = User(**admin_data)
-        await db.users.insert_one(admin.dict())
-        logger.info("Admin user created: username=admin, password=admin123")
+        try:
+            result = await db.users.update_one(
+                {"username": admin.username},
+                {"$setOnInsert": admin.dict()},
+                upsert=True
+            )
+            if result.upserted_id is not None:
+                logger.info("Admin user created: username=admin, password=admin123")
+        except DuplicateKeyError:
+            # Another worker inserted it first
+            pass
     
-    # Start cleanup task
-    asyncio.create_task(cleanup_expired_users())
+    startup_timings["startup"] = round(time.perf_counter() - started_at, 4)
+    
+    loop_monitor.start()
+    
+    # Start background jobs; only the lease holder actually runs them
+    background_tasks.append(asyncio.create_task(run_background_jobs(background_lease)))
+    
+    # Every worker relays the stream events published by the others
+    background_tasks.append(asyncio.create_task(event_broker.run_relay(STREAM_RELAY_INTERVAL)))
+    
+    # Warm up in the background: /healthz answers right away while /readyz
+    # reports 503 until the pool and caches are warm
+    background_tasks.append(asyncio.create_task(warm_up()))
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    loop_monitor.stop()
+    event_broker.close()
+    for task in background_tasks:
+        task.cancel()
+    try:
+        await background_lease.release()
+    except Exception as e:
+        logger.error(f"Error releasing background jobs lease: {e}")
+    client.close()
+    password_hasher.shutdown()
\ No newline at end of file
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for Núcleo Bets server.py hot paths
+Times the per-request building blocks (JWT, bcrypt, model validation and
+JSON encoding) and writes machine-readable results that can be compared
+against a saved baseline before deploying.
+
+Usage:
+    python backend_benchmark.py --output bench.json
+    python backend_benchmark.py --compare bench.json --threshold 15
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+# Only the connection settings are needed to import server.py; the benchmarks
+# below never query the database
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "nucleobets_benchmark")
+
+from bson import ObjectId  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from typing import List  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+
+LIST_SIZES = (10, 50, 1000)
+
+
+def raw_analysis(now):
+    """A document shaped like what Motor returns for db.analyses"""
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "title": "Análise Flamengo vs Palmeiras",
+        "match_info": "Flamengo vs Palmeiras - Brasileirão",
+        "bet_type": random.choice([bet_type.value for bet_type in server.BetType]),
+        "confidence": round(random.uniform(55, 95), 1),
+        "detailed_analysis": "Flamengo tem melhor desempenho em casa e Palmeiras tem 3 jogadores lesionados. " * 10,
+        "odds": f"{random.uniform(1.3, 4.5):.2f}",
+        "created_at": now - timedelta(minutes=random.randint(0, 100000)),
+        "match_date": now + timedelta(days=random.randint(-30, 3)),
+        "result": random.choice([result.value for result in server.AnalysisResult]),
+    }
+
+
+def raw_valuable_tip(now):
+    """A document shaped like what Motor returns for db.valuable_tips"""
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "title": "Tripla Especial - Copa do Brasil",
+        "description": "Combinação de 3 jogos com alta probabilidade de acerto",
+        "games": "Flamengo vs Palmeiras - Casa (1.80)\nSantos vs Corinthians - Over 2.5 (2.10)",
+        "total_odds": f"{random.uniform(3, 15):.2f}",
+        "stake_suggestion": "5-10% da banca",
+        "created_at": now - timedelta(minutes=random.randint(0, 100000)),
+    }
+
+
+def measure(func, min_time, repeats):
+    """Time func, returning per-call seconds for each repeat"""
+    loops = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= min_time / repeats or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started_at) / loops)
+    return loops, samples
+
+
+def build_benchmarks():
+    random.seed(1234)
+    now = datetime.utcnow()
+    benchmarks = {}
+
+    # JWT
+    token = server.create_access_token({"sub": str(uuid.uuid4())}, timedelta(minutes=server.ACCESS_TOKEN_EXPIRE_MINUTES))
+    benchmarks["jwt.create_access_token"] = lambda: server.create_access_token(
+        {"sub": "user-id"}, timedelta(minutes=server.ACCESS_TOKEN_EXPIRE_MINUTES))
+    # The same verification get_current_user runs, token type check included
+    benchmarks["jwt.decode_token"] = lambda: server.decode_token(token)
+
+    # bcrypt at the cost the server uses (bcrypt.gensalt() default)
+    hashed = server.hash_password("senha123")
+    benchmarks["bcrypt.hash_password"] = lambda: server.hash_password("senha123")
+    benchmarks["bcrypt.verify_password"] = lambda: server.verify_password("senha123", hashed)
+
+    # Model building and JSON encoding
+    analysis_list = TypeAdapter(List[server.Analysis])
+    for size in LIST_SIZES:
+        analyses = [raw_analysis(now) for _ in range(size)]
+        tips = [raw_valuable_tip(now) for _ in range(size)]
+        analysis_models = [server.Analysis(**doc) for doc in analyses]
+        tip_models = [server.ValuableTip(**doc) for doc in tips]
+        summaries = [{k: v for k, v in doc.items() if k in server.AnalysisSummary.model_fields} for doc in analyses]
+
+        benchmarks[f"models.Analysis[{size}]"] = lambda docs=analyses: [server.Analysis(**doc) for doc in docs]
+        benchmarks[f"models.ValuableTip[{size}]"] = lambda docs=tips: [server.ValuableTip(**doc) for doc in docs]
+        benchmarks[f"models.AnalysisSummary.validate_python[{size}]"] = (
+            lambda docs=summaries: server.ANALYSIS_SUMMARY_LIST.validate_python(docs))
+        benchmarks[f"json.jsonable_encoder.Analysis[{size}]"] = (
+            lambda models=analysis_models: json.dumps(jsonable_encoder(models)).encode("utf-8"))
+        benchmarks[f"json.jsonable_encoder.ValuableTip[{size}]"] = (
+            lambda models=tip_models: json.dumps(jsonable_encoder(models)).encode("utf-8"))
+        benchmarks[f"json.dump_json.Analysis[{size}]"] = lambda models=analysis_models: analysis_list.dump_json(models)
+        benchmarks[f"json.dump_json.ValuableTip[{size}]"] = (
+            lambda models=tip_models: server.VALUABLE_TIP_LIST.dump_json(models))
+
+    return benchmarks
+
+
+def run(args):
+    results = {}
+    for name, func in build_benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+        loops, samples = measure(func, args.min_time, args.repeats)
+        results[name] = {
+            "loops": loops,
+            "repeats": len(samples),
+            "mean_us": round(statistics.mean(samples) * 1e6, 3),
+            "median_us": round(statistics.median(samples) * 1e6, 3),
+            "min_us": round(min(samples) * 1e6, 3),
+            "stdev_us": round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0,
+        }
+        print(f"{name:<50}{results[name]['median_us']:>14.1f} µs  (±{results[name]['stdev_us']:.1f})")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print changes against the baseline and return the regressed benchmarks"""
+    regressions = []
+    print("\n📊 Compared with baseline (median):")
+    for name, stats in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous["median_us"]:
+            continue
+        change = (stats["median_us"] - previous["median_us"]) / previous["median_us"] * 100
+        marker = "❌" if change > threshold else "✅"
+        print(f"{marker} {name:<50}{previous['median_us']:>12.1f} → {stats['median_us']:>12.1f} µs ({change:+.1f}%)")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the Núcleo Bets backend")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON produced by --output")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.5, help="Approximate seconds per benchmark")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) slower than {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Local Load Testing for Núcleo Bets
+Starts the backend against a local mongod, seeds realistic data and drives
+concurrent mixed workloads (login storms, dashboard polling, admin
+settlement), reporting p50/p95/p99 latency and requests per second per route.
+
+Usage:
+    python backend_load_test.py --duration 60 --save baseline.json
+    python backend_load_test.py --duration 60 --compare baseline.json
+    python backend_load_test.py --mongo-url mongodb://localhost:27017 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import bcrypt
+import httpx
+from pymongo import MongoClient
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+SEED_PASSWORD = "carga123"
+
+TEAMS = [
+    "Flamengo", "Palmeiras", "Corinthians", "São Paulo", "Santos", "Grêmio",
+    "Internacional", "Atlético Mineiro", "Cruzeiro", "Fluminense", "Botafogo",
+    "Vasco da Gama", "Bahia", "Fortaleza", "Athletico Paranaense", "Ceará",
+]
+COMPETITIONS = ["Brasileirão", "Copa do Brasil", "Libertadores", "Sul-Americana"]
+BET_TYPES = ["1", "X", "2", "over", "under", "1x", "2x"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class LocalMongod:
+    """Runs a throwaway mongod unless an external MONGO_URL is given"""
+
+    def __init__(self, mongo_url=None):
+        self.mongo_url = mongo_url
+        self.process = None
+        self.dbpath = None
+
+    def __enter__(self):
+        if self.mongo_url:
+            return self.mongo_url
+
+        mongod = shutil.which("mongod")
+        if not mongod:
+            sys.exit("❌ mongod not found in PATH; pass --mongo-url to use an existing server")
+
+        port = free_port()
+        self.dbpath = tempfile.mkdtemp(prefix="nucleo-loadtest-")
+        self.process = subprocess.Popen(
+            [mongod, "--dbpath", self.dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.mongo_url = f"mongodb://127.0.0.1:{port}"
+
+        client = MongoClient(self.mongo_url, serverSelectionTimeoutMS=500)
+        deadline = time.time() + 30
+        while True:
+            try:
+                client.admin.command("ping")
+                break
+            except Exception:
+                if time.time() > deadline:
+                    sys.exit("❌ mongod did not start within 30s")
+                time.sleep(0.2)
+        client.close()
+        print(f"🍃 Started local mongod at {self.mongo_url}")
+        return self.mongo_url
+
+    def __exit__(self, *exc):
+        if self.process:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+            shutil.rmtree(self.dbpath, ignore_errors=True)
+
+
+class AppServer:
+    """Runs the backend with uvicorn in a subprocess"""
+
+    def __init__(self, mongo_url, db_name, workers, login_throttle=False):
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.workers = workers
+        self.login_throttle = login_throttle
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}/api"
+        self.process = None
+
+    def __enter__(self):
+        env = {**os.environ, "MONGO_URL": self.mongo_url, "DB_NAME": self.db_name}
+        if not self.login_throttle:
+            # Every client here is 127.0.0.1 and logins reuse a few thousand
+            # usernames, so the default limits would turn login load into 429s
+            env.update({
+                "LOGIN_USERNAME_BURST": "1000000", "LOGIN_USERNAME_RATE": "1000000",
+                "LOGIN_IP_BURST": "1000000", "LOGIN_IP_RATE": "1000000",
+            })
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        deadline = time.time() + 60
+        while True:
+            try:
+                if httpx.get(f"{self.base_url}/", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if self.process.poll() is not None or time.time() > deadline:
+                sys.exit("❌ Backend did not start")
+            time.sleep(0.2)
+        print(f"🚀 Backend running at {self.base_url} with {self.workers} worker(s)")
+        return self
+
+    def __exit__(self, *exc):
+        if self.process:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+
+def seed(mongo_url, db_name, users, analyses, tips):
+    """Drop the load-test database and fill it with realistic volumes"""
+    client = MongoClient(mongo_url)
+    client.drop_database(db_name)
+    db = client[db_name]
+    now = datetime.utcnow()
+
+    # One bcrypt hash shared by every seeded user keeps seeding fast
+    password_hash = bcrypt.hashpw(SEED_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    db.users.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "username": f"carga_{i}",
+            "email": f"carga_{i}@nucleobets.com",
+            "password_hash": password_hash,
+            "role": "user",
+            "is_active": True,
+            "created_at": now - timedelta(days=random.randint(0, 30)),
+            "approved_by_admin": True,
+            "expires_at": now + timedelta(days=31),
+        }
+        for i in range(users)
+    ])
+
+    analysis_docs = []
+    for i in range(analyses):
+        home, away = random.sample(TEAMS, 2)
+        created_at = now - timedelta(minutes=random.randint(0, 365 * 24 * 60))
+        match_date = created_at + timedelta(days=random.randint(0, 3))
+        result = "pending" if match_date > now else random.choices(["green", "red"], weights=[6, 4])[0]
+        analysis_docs.append({
+            "id": str(uuid.uuid4()),
+            "title": f"Análise {home} vs {away}",
+            "match_info": f"{home} vs {away} - {random.choice(COMPETITIONS)}",
+            "bet_type": random.choice(BET_TYPES),
+            "confidence": round(random.uniform(55, 95), 1),
+            "detailed_analysis": " ".join(
+                f"{home} vem de {random.randint(1, 6)} jogos sem perder em casa, enquanto {away} "
+                f"sofreu {random.randint(3, 12)} gols nas últimas partidas fora."
+                for _ in range(random.randint(5, 15))
+            ),
+            "odds": f"{random.uniform(1.3, 4.5):.2f}",
+            "created_at": created_at,
+            "match_date": match_date,
+            "result": result,
+        })
+    if analysis_docs:
+        db.analyses.insert_many(analysis_docs)
+
+    tip_docs = []
+    for i in range(tips):
+        games = [random.sample(TEAMS, 2) for _ in range(3)]
+        tip_docs.append({
+            "id": str(uuid.uuid4()),
+            "title": f"Múltipla {i} - {random.choice(COMPETITIONS)}",
+            "description": "Combinação de jogos com alta probabilidade de acerto",
+            "games": "\n".join(f"{home} vs {away} - Casa ({random.uniform(1.3, 2.5):.2f})" for home, away in games),
+            "total_odds": f"{random.uniform(3, 15):.2f}",
+            "stake_suggestion": "5-10% da banca",
+            "created_at": now - timedelta(minutes=random.randint(0, 365 * 24 * 60)),
+        })
+    if tip_docs:
+        db.valuable_tips.insert_many(tip_docs)
+
+    pending_ids = [doc["id"] for doc in analysis_docs if doc["result"] == "pending"]
+    client.close()
+    print(f"🌱 Seeded {users} users, {analyses} analyses ({len(pending_ids)} pending), {tips} valuable tips")
+    return pending_ids
+
+
+class Recorder:
+    """Collects latency samples and status codes per route"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, route, seconds, status):
+        self.latencies.setdefault(route, []).append(seconds)
+        counts = self.statuses.setdefault(route, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    def error(self, route, exc):
+        self.errors[route] = self.errors.get(route, 0) + 1
+
+    async def request(self, client, method, route, url, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.error(route, e)
+            return None
+        self.record(route, time.perf_counter() - started_at, response.status_code)
+        return response
+
+    def summary(self, elapsed):
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(route, []))
+            routes[route] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2) if elapsed else 0,
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+                "statuses": {str(k): v for k, v in sorted(self.statuses.get(route, {}).items())},
+                "errors": self.errors.get(route, 0),
+            }
+        return routes
+
+
+async def login(client, username, password):
+    response = await client.post("/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def login_storm(client, recorder, deadline, users):
+    while time.monotonic() < deadline:
+        username = f"carga_{random.randrange(users)}"
+        await recorder.request(client, "POST", "POST /api/auth/login", "/auth/login",
+                               json={"username": username, "password": SEED_PASSWORD})
+
+
+async def dashboard_poller(client, recorder, deadline, headers, interval):
+    # Behaves like the dashboard: revalidates with the ETag it last received
+    etags = {}
+    while time.monotonic() < deadline:
+        for path in ("/stats", "/analysis", "/valuable-tips"):
+            request_headers = dict(headers)
+            if path in etags:
+                request_headers["If-None-Match"] = etags[path]
+            response = await recorder.request(client, "GET", f"GET /api{path}", path, headers=request_headers)
+            if response is not None and "etag" in response.headers:
+                etags[path] = response.headers["etag"]
+        if interval:
+            await asyncio.sleep(interval)
+
+
+async def admin_settler(client, recorder, deadline, headers, pending_ids, batch_size, interval):
+    while time.monotonic() < deadline and pending_ids:
+        batch = [pending_ids.pop() for _ in range(min(batch_size, len(pending_ids)))]
+        payload = [{"id": analysis_id, "result": random.choice(["green", "red"])} for analysis_id in batch]
+        await recorder.request(client, "POST", "POST /api/admin/analysis/settle", "/admin/analysis/settle",
+                               json=payload, headers=headers)
+        await asyncio.sleep(interval)
+
+
+async def run_workload(args, base_url, pending_ids):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        admin_headers = await login(client, ADMIN_USERNAME, ADMIN_PASSWORD)
+        poller_headers = [
+            await login(client, f"carga_{i % args.users}", SEED_PASSWORD)
+            for i in range(args.pollers)
+        ] if "dashboard" in args.scenarios else []
+
+        print(f"🔥 Running {', '.join(args.scenarios)} for {args.duration}s")
+        started_at = time.monotonic()
+        deadline = started_at + args.duration
+        workers = []
+        if "login" in args.scenarios:
+            workers += [login_storm(client, recorder, deadline, args.users) for _ in range(args.login_concurrency)]
+        if "dashboard" in args.scenarios:
+            workers += [dashboard_poller(client, recorder, deadline, headers, args.poll_interval) for headers in poller_headers]
+        if "settlement" in args.scenarios:
+            workers.append(admin_settler(client, recorder, deadline, admin_headers, pending_ids,
+                                         args.settle_batch, args.settle_interval))
+        await asyncio.gather(*workers)
+        elapsed = time.monotonic() - started_at
+    return recorder.summary(elapsed), elapsed
+
+
+def print_report(routes, baseline=None):
+    header = f"{'Route':<38}{'Reqs':>8}{'RPS':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Errors':>8}"
+    print("\n" + "=" * len(header))
+    print("📊 LOAD TEST RESULTS" + (" (Δ vs baseline)" if baseline else ""))
+    print("=" * len(header))
+    print(header)
+    for route, stats in routes.items():
+        print(f"{route:<38}{stats['requests']:>8}{stats['rps']:>10}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}")
+        previous = (baseline or {}).get(route)
+        if previous:
+            def delta(key):
+                if not previous[key]:
+                    return "n/a"
+                return f"{(stats[key] - previous[key]) / previous[key] * 100:+.1f}%"
+            print(f"{'':<38}{'':>8}{delta('rps'):>10}{delta('p50_ms'):>10}{delta('p95_ms'):>10}{delta('p99_ms'):>10}")
+    for route, stats in routes.items():
+        non_2xx = {status: count for status, count in stats["statuses"].items() if not status.startswith(("2", "3"))}
+        if non_2xx:
+            print(f"⚠️  {route}: {non_2xx}")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local load test for the Núcleo Bets backend")
+    parser.add_argument("--mongo-url", help="Use an existing MongoDB instead of starting mongod")
+    parser.add_argument("--db-name", default="nucleobets_loadtest")
+    parser.add_argument("--base-url", help="Target an already running backend (…/api); skips seeding and startup")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--analyses", type=int, default=20000)
+    parser.add_argument("--tips", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--scenarios", default="login,dashboard,settlement",
+                        type=lambda value: [name.strip() for name in value.split(",") if name.strip()])
+    parser.add_argument("--login-concurrency", type=int, default=20)
+    parser.add_argument("--pollers", type=int, default=100)
+    parser.add_argument("--poll-interval", type=float, default=0.0)
+    parser.add_argument("--settle-batch", type=int, default=50)
+    parser.add_argument("--settle-interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--login-throttle", action="store_true",
+                        help="Keep the server's login rate limits instead of lifting them")
+    parser.add_argument("--save", help="Write results as JSON (e.g. a baseline)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    args = parser.parse_args()
+
+    if args.base_url:
+        # Pending ids are only known when this script seeds the data
+        results, elapsed = asyncio.run(run_workload(args, args.base_url, []))
+    else:
+        with LocalMongod(args.mongo_url) as mongo_url:
+            pending_ids = seed(mongo_url, args.db_name, args.users, args.analyses, args.tips)
+            random.shuffle(pending_ids)
+            with AppServer(mongo_url, args.db_name, args.workers, args.login_throttle) as server:
+                results, elapsed = asyncio.run(run_workload(args, server.base_url, pending_ids))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["routes"]
+    print_report(results, baseline)
+
+    if args.save:
+        report = {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat(),
+                "git_revision": git_revision(),
+                "elapsed": round(elapsed, 2),
+                "args": {key: value for key, value in vars(args).items() if key not in ("save", "compare")},
+            },
+            "routes": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
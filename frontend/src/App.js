@@ -1,4 +1,4 @@
-import React, { useState, useEffect, createContext, useContext } from 'react';
+import React, { useState, useEffect, useRef, createContext, useContext } from 'react';
 import './App.css';
 import axios from 'axios';
 
@@ -431,11 +431,15 @@ const Dashboard = () => {
   const [stats, setStats] = useState(null);
   const [users, setUsers] = useState([]);
   const [editingAnalysis, setEditingAnalysis] = useState(null);
+  const [analysisDetails, setAnalysisDetails] = useState({});
   const [editingValuableTip, setEditingValuableTip] = useState(null);
   const [showCreateUserForm, setShowCreateUserForm] = useState(false);
   const [showCreateValuableTipForm, setShowCreateValuableTipForm] = useState(false);
   const [showChangePassword, setShowChangePassword] = useState(false);
   const [dateFilter, setDateFilter] = useState('all'); // 'yesterday', 'today', 'tomorrow', 'all'
+  const dateFilterRef = useRef('all');
+  const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null); // null when not searching
   const [passwordData, setPasswordData] = useState({
     currentPassword: '',
     newPassword: '',
@@ -468,39 +472,117 @@ const Dashboard = () => {
 
   useEffect(() => {
     fetchStats();
-    fetchAnalyses();
     fetchValuableTips();
     if (user?.role === 'admin') {
       fetchUsers();
     }
   }, []);
 
-  const getFilteredAnalyses = () => {
-    if (dateFilter === 'all') return analyses;
-    
-    const today = new Date();
-    const yesterday = new Date(today);
-    yesterday.setDate(yesterday.getDate() - 1);
-    const tomorrow = new Date(today);
-    tomorrow.setDate(tomorrow.getDate() + 1);
-
-    return analyses.filter(analysis => {
-      const matchDate = new Date(analysis.match_date);
-      const analysisDay = matchDate.toDateString();
-      
-      switch (dateFilter) {
-        case 'yesterday':
-          return analysisDay === yesterday.toDateString();
-        case 'today':
-          return analysisDay === today.toDateString();
-        case 'tomorrow':
-          return analysisDay === tomorrow.toDateString();
-        default:
-          return true;
+  // Live updates: refetch only what changed when the server pushes an event
+  useEffect(() => {
+    if (!localStorage.getItem('token') || typeof EventSource === 'undefined') return;
+
+    let source = null;
+    let reconnectTimer = null;
+    let closed = false;
+    const refreshAnalyses = () => {
+      fetchAnalyses();
+      fetchStats();
+    };
+    const refreshAll = () => {
+      refreshAnalyses();
+      fetchValuableTips();
+    };
+
+    // EventSource cannot send the Authorization header, so each connection
+    // uses a short-lived stream ticket instead of the access token
+    const connect = async () => {
+      let ticket;
+      try {
+        const response = await axios.post(`${API}/stream/ticket`);
+        ticket = response.data.ticket;
+      } catch (error) {
+        console.error('Error opening live updates:', error);
+        return;
       }
-    });
+      if (closed) return;
+
+      source = new EventSource(`${API}/stream?ticket=${encodeURIComponent(ticket)}`);
+      ['analysis.created', 'analysis.updated', 'analysis.deleted', 'analysis.settled'].forEach(event =>
+        source.addEventListener(event, refreshAnalyses)
+      );
+      ['valuable_tip.created', 'valuable_tip.updated', 'valuable_tip.deleted'].forEach(event =>
+        source.addEventListener(event, fetchValuableTips)
+      );
+      source.addEventListener('resync', refreshAll);
+      source.onerror = () => {
+        // A used-up ticket is rejected and the browser gives up; get a new one
+        if (source.readyState === EventSource.CLOSED && !closed) {
+          reconnectTimer = setTimeout(connect, 5000);
+        }
+      };
+    };
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
+      if (source) source.close();
+    };
+  }, []);
+
+  // match_date holds the wall-clock time the admin entered, so day boundaries
+  // are sent without a timezone and filtered by the server
+  const matchDateParams = (filter) => {
+    const offsets = { yesterday: -1, today: 0, tomorrow: 1 };
+    if (!(filter in offsets)) return {};
+    const day = new Date();
+    day.setDate(day.getDate() + offsets[filter]);
+    const date = [
+      day.getFullYear(),
+      String(day.getMonth() + 1).padStart(2, '0'),
+      String(day.getDate()).padStart(2, '0')
+    ].join('-');
+    return { match_date_from: `${date}T00:00:00`, match_date_to: `${date}T23:59:59.999999` };
   };
 
+  const runSearch = async (query, filter) => {
+    try {
+      const response = await axios.get(`${API}/analysis/search`, {
+        params: { q: query, ...matchDateParams(filter) }
+      });
+      setSearchResults(response.data);
+    } catch (error) {
+      console.error('Error searching analyses:', error);
+    }
+  };
+
+  const searchAnalyses = async (e) => {
+    e.preventDefault();
+    const query = searchQuery.trim();
+    if (query.length < 2) {
+      setSearchResults(null);
+      return;
+    }
+    await runSearch(query, dateFilter);
+  };
+
+  const clearSearch = () => {
+    setSearchQuery('');
+    setSearchResults(null);
+  };
+
+  // Refetch with the new day filter; the stream handlers read it from the ref
+  useEffect(() => {
+    dateFilterRef.current = dateFilter;
+    fetchAnalyses();
+    if (searchResults !== null && searchQuery.trim().length >= 2) {
+      runSearch(searchQuery.trim(), dateFilter);
+    }
+  }, [dateFilter]);
+
+  const getFilteredAnalyses = () => searchResults ?? analyses;
+
   const quickUpdateResult = async (analysisId, result) => {
     try {
       await axios.put(`${API}/admin/analysis/${analysisId}`, { result });
@@ -541,13 +623,42 @@ const Dashboard = () => {
 
   const fetchAnalyses = async () => {
     try {
-      const response = await axios.get(`${API}/analysis`);
+      const response = await axios.get(`${API}/analysis`, {
+        params: matchDateParams(dateFilterRef.current)
+      });
       setAnalyses(response.data);
     } catch (error) {
       console.error('Error fetching analyses:', error);
     }
   };
 
+  // The analyses list only carries summaries; the full text is loaded on demand
+  const fetchAnalysisDetail = async (analysisId) => {
+    const response = await axios.get(`${API}/analysis/${analysisId}`);
+    setAnalysisDetails(details => ({ ...details, [analysisId]: response.data }));
+    return response.data;
+  };
+
+  const toggleAnalysisDetail = async (analysisId) => {
+    if (analysisDetails[analysisId]) {
+      setAnalysisDetails(({ [analysisId]: _, ...details }) => details);
+      return;
+    }
+    try {
+      await fetchAnalysisDetail(analysisId);
+    } catch (error) {
+      console.error('Error fetching analysis detail:', error);
+    }
+  };
+
+  const startEditingAnalysis = async (analysisId) => {
+    try {
+      setEditingAnalysis(await fetchAnalysisDetail(analysisId));
+    } catch (error) {
+      console.error('Error fetching analysis detail:', error);
+    }
+  };
+
   const fetchValuableTips = async () => {
     try {
       const response = await axios.get(`${API}/valuable-tips`);
@@ -559,8 +670,15 @@ const Dashboard = () => {
 
   const fetchUsers = async () => {
     try {
-      const response = await axios.get(`${API}/admin/users`);
-      setUsers(response.data);
+      // The users list is paginated; follow the next-page cursor until the end
+      let allUsers = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(`${API}/admin/users`, { params: cursor ? { cursor } : {} });
+        allUsers = allUsers.concat(response.data);
+        cursor = response.headers['x-next-cursor'];
+      } while (cursor);
+      setUsers(allUsers);
     } catch (error) {
       console.error('Error fetching users:', error);
     }
@@ -641,6 +759,7 @@ const Dashboard = () => {
     e.preventDefault();
     try {
       await axios.put(`${API}/admin/analysis/${editingAnalysis.id}`, editingAnalysis);
+      setAnalysisDetails(({ [editingAnalysis.id]: _, ...details }) => details);
       setEditingAnalysis(null);
       fetchAnalyses();
       fetchStats();
@@ -881,6 +1000,32 @@ const Dashboard = () => {
               </div>
             </div>
 
+            {/* Search */}
+            <form onSubmit={searchAnalyses} className="flex space-x-2">
+              <input
+                type="text"
+                value={searchQuery}
+                onChange={(e) => setSearchQuery(e.target.value)}
+                placeholder="Buscar por time, campeonato ou palavra-chave"
+                className="flex-1 px-4 py-2 bg-slate-700/80 backdrop-blur-sm border border-slate-600 rounded-lg text-white placeholder-slate-400 focus:outline-none focus:ring-2 focus:ring-purple-500 focus:border-transparent"
+              />
+              <button
+                type="submit"
+                className="px-4 py-2 bg-purple-600 hover:bg-purple-700 text-white rounded-lg transition-colors"
+              >
+                Buscar
+              </button>
+              {searchResults !== null && (
+                <button
+                  type="button"
+                  onClick={clearSearch}
+                  className="px-4 py-2 bg-slate-700 hover:bg-slate-600 text-slate-300 rounded-lg transition-colors"
+                >
+                  Limpar
+                </button>
+              )}
+            </form>
+
             {/* Palpites Valiosos Section */}
             {valuableTips.length > 0 && (
               <div className="space-y-4">
@@ -944,7 +1089,15 @@ const Dashboard = () => {
                       <h3 className="text-xl font-semibold text-white">{analysis.title}</h3>
                       <p className="text-slate-400 mt-1">{analysis.match_info}</p>
                       <div className="mt-4 text-slate-300">
-                        <p className="whitespace-pre-wrap">{analysis.detailed_analysis}</p>
+                        {analysisDetails[analysis.id] && (
+                          <p className="whitespace-pre-wrap">{analysisDetails[analysis.id].detailed_analysis}</p>
+                        )}
+                        <button
+                          onClick={() => toggleAnalysisDetail(analysis.id)}
+                          className="mt-2 text-sm text-purple-400 hover:text-purple-300 transition-colors"
+                        >
+                          {analysisDetails[analysis.id] ? 'Ocultar análise' : 'Ver análise completa'}
+                        </button>
                       </div>
                     </div>
                     <div className="text-right ml-4">
@@ -992,7 +1145,7 @@ const Dashboard = () => {
                       {user?.role === 'admin' && (
                         <div className="flex space-x-2">
                           <button
-                            onClick={() => setEditingAnalysis(analysis)}
+                            onClick={() => startEditingAnalysis(analysis.id)}
                             className="px-3 py-1 bg-blue-600 hover:bg-blue-700 text-white text-xs rounded-lg transition-colors"
                           >
                             Editar
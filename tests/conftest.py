@@ -0,0 +1,47 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+# Motor only opens connections on the first query, so the import below works
+# without a MongoDB server; tests that need one use the mongo fixture
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "nucleobets_test")
+
+import server  # noqa: E402
+
+GREEN, RED, PENDING = (result.value for result in (
+    server.AnalysisResult.GREEN, server.AnalysisResult.RED, server.AnalysisResult.PENDING))
+
+
+def analysis_doc(analysis_id: str, result=PENDING, odds="1.80", bet_type="over",
+                 match_date=datetime(2026, 3, 14, 20, 30), **fields) -> dict:
+    """A stored analysis document; result=None leaves the field out, like legacy documents."""
+    doc = {
+        "id": analysis_id, "title": "Flamengo vs Palmeiras", "match_info": "Brasileirão", "bet_type": bet_type,
+        "confidence": 70.0, "detailed_analysis": "Análise", "odds": odds, "created_at": datetime(2026, 3, 1),
+        "match_date": match_date, "result": result, **fields,
+    }
+    if result is None:
+        del doc["result"]
+    return doc
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Point server.py at a fresh in-memory database"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    client = AsyncMongoMockClient()
+    database = client["nucleobets_test"]
+    monkeypatch.setattr(server, "client", client)
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "public_db", database)
+    server.response_cache.clear()
+    server.user_cache.clear()
+    server.users_version.update(value=0, checked_at=None)
+    return database
@@ -0,0 +1,59 @@
+import asyncio
+
+import server
+
+from .conftest import GREEN, PENDING, RED, analysis_doc
+
+
+def add(total: dict, delta: dict):
+    for field, value in delta.items():
+        total[field] = total.get(field, 0) + value
+
+
+def test_lifecycle_deltas_sum_to_zero():
+    total = {}
+    for old, new in ((None, PENDING), (PENDING, GREEN), (GREEN, RED), (RED, RED), (RED, None)):
+        add(total, server.analysis_stats_delta(old, new))
+    assert not any(total.values())
+
+
+def test_deltas():
+    assert server.analysis_stats_delta(None, PENDING) == {"total": 1, PENDING: 1}
+    assert server.analysis_stats_delta(PENDING, GREEN) == {PENDING: -1, GREEN: 1}
+    assert server.analysis_stats_delta(GREEN, GREEN) == {}
+    assert server.analysis_stats_delta(RED, None) == {"total": -1, RED: -1}
+    # Enum members and their values count the same
+    assert server.analysis_stats_delta(server.AnalysisResult.GREEN, GREEN) == {}
+
+
+def test_incremental_counters_match_reconcile(mongo):
+    transitions = [
+        ("a", None, PENDING), ("b", None, PENDING), ("c", None, GREEN),
+        ("a", PENDING, GREEN), ("b", PENDING, RED), ("a", GREEN, RED), ("c", GREEN, None),
+    ]
+
+    async def scenario():
+        for analysis_id, old, new in transitions:
+            if new is None:
+                await mongo.analyses.delete_one({"id": analysis_id})
+            else:
+                await mongo.analyses.update_one({"id": analysis_id}, {"$set": {"result": new}}, upsert=True)
+            await server.increment_analysis_stats(server.analysis_stats_delta(old, new))
+
+        report = await server.reconcile_analysis_stats()
+        assert report["drift"] == {}
+        assert report["after"] == {"total": 2, GREEN: 0, RED: 2, PENDING: 0}
+
+    asyncio.run(scenario())
+
+
+def test_update_of_a_document_without_result_counts_it_as_pending(mongo):
+    legacy = analysis_doc("a", result=None)
+
+    async def scenario():
+        await mongo.analyses.insert_one(dict(legacy))
+        await server.reconcile_analysis_stats()
+        await server.update_analysis("a", server.AnalysisUpdate(result=GREEN), None)
+        assert (await server.reconcile_analysis_stats())["drift"] == {}
+
+    asyncio.run(scenario())
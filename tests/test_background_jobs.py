@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import server
+
+
+def at_server_time(value, now: datetime):
+    """Evaluate the $$NOW expressions mongomock leaves alone at a fixed time."""
+    if value == "$$NOW":
+        return now
+    if isinstance(value, list):
+        return [at_server_time(item, now) for item in value]
+    if isinstance(value, dict):
+        value = {key: at_server_time(item, now) for key, item in value.items()}
+        if list(value) == ["$add"] and isinstance(value["$add"][0], datetime):
+            return value["$add"][0] + timedelta(milliseconds=sum(value["$add"][1:]))
+    return value
+
+
+def test_warm_up_leaves_stats_to_the_lease_holder(mongo, monkeypatch):
+    monkeypatch.setattr(server, "MONGO_WARMUP_CONNECTIONS", 0)
+    monkeypatch.setattr(server.readiness, "warmed_up", False)
+
+    async def scenario():
+        await server.warm_up()
+        assert await mongo.stats.count_documents({}) == 0
+        assert await mongo.daily_stats.count_documents({}) == 0
+
+    asyncio.run(scenario())
+
+
+def test_background_jobs_seed_stats(mongo, monkeypatch):
+    monkeypatch.setitem(server.daily_stats_seed, "done", False)
+    names = [name for name, _, _ in server.BACKGROUND_JOBS]
+    assert {"reconcile_analysis_stats", "seed_daily_stats"} <= set(names)
+
+    async def scenario():
+        for _, _, job in server.BACKGROUND_JOBS:
+            if job in (server.reconcile_stats_job, server.seed_daily_stats_job):
+                await job()
+        assert await mongo.stats.find_one({"_id": server.ANALYSIS_STATS_ID}) is not None
+        assert server.daily_stats_seed["done"]
+
+    asyncio.run(scenario())
+
+
+def test_lease_take_renew_collision_and_takeover(mongo, monkeypatch):
+    server_clock = {"now": datetime(2026, 6, 1, 12)}
+    update_one = type(mongo.leases).update_one
+
+    async def update_at_server_time(self, query, update, **kwargs):
+        now = server_clock["now"]
+        return await update_one(self, at_server_time(query, now), at_server_time(update, now), **kwargs)
+
+    monkeypatch.setattr(type(mongo.leases), "update_one", update_at_server_time)
+    first = server.LeaderLease("jobs", "worker-a", 30)
+    second = server.LeaderLease("jobs", "worker-b", 30)
+
+    async def scenario():
+        assert await first.acquire()
+        lease = await mongo.leases.find_one({"_id": "jobs"})
+        assert (lease["owner"], lease["expires_at"]) == ("worker-a", datetime(2026, 6, 1, 12, 0, 30))
+
+        # The holder renews; the other worker collides with a live lease
+        server_clock["now"] += timedelta(seconds=20)
+        assert await first.acquire()
+        assert not await second.acquire()
+        assert (await mongo.leases.find_one({"_id": "jobs"}))["expires_at"] == datetime(2026, 6, 1, 12, 0, 50)
+
+        # Once the holder stops renewing, the lease passes on expiry
+        server_clock["now"] += timedelta(seconds=29)
+        assert not await second.acquire()
+        server_clock["now"] += timedelta(seconds=2)
+        assert await second.acquire()
+        assert not await first.acquire()
+        assert (await mongo.leases.find_one({"_id": "jobs"}))["owner"] == "worker-b"
+
+        await second.release()
+        assert await mongo.leases.find_one({"_id": "jobs"}) is None
+        assert await first.acquire()
+
+    asyncio.run(scenario())
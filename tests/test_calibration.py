@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+import pytest
+
+import server
+
+
+def bucket_ranges(confidences, bucket_count=10):
+    probability = np.array(confidences, dtype=float) / 100
+    report = server.calibration_report(probability, np.zeros(len(confidences)), bucket_count)
+    return [(bucket["min_confidence"], bucket["max_confidence"], bucket["count"]) for bucket in report["buckets"]]
+
+
+@pytest.mark.parametrize("confidence", range(0, 100, 10))
+def test_whole_percentages_on_an_edge_open_their_bucket(confidence):
+    assert bucket_ranges([confidence]) == [(confidence, confidence + 10, 1)]
+
+
+def test_bucket_boundaries():
+    assert bucket_ranges([100]) == [(90, 100, 1)]
+    assert bucket_ranges([29, 29.99, 30]) == [(20, 30, 2), (30, 40, 1)]
+    assert bucket_ranges([25, 50, 75], bucket_count=4) == [(25, 50, 1), (50, 75, 1), (75, 100, 1)]
+    assert bucket_ranges([33, 34, 67], bucket_count=3) == [(0, 33.33, 1), (33.33, 66.67, 1), (66.67, 100, 1)]
+
+
+def test_scores_on_a_hand_computed_sample():
+    report = server.calibration_report(np.array([0.8, 0.6]), np.array([1.0, 0.0]), 10)
+    assert report["settled"] == 2
+    assert report["base_rate"] == 0.5
+    # ((0.8 - 1)^2 + (0.6 - 0)^2) / 2
+    assert report["brier_score"] == 0.2
+    assert report["reference_brier_score"] == 0.25
+    assert report["log_loss"] == round(-(math.log(0.8) + math.log(0.4)) / 2, 4) == 0.5697
+    # Half the sample 0.2 off in the 80s bucket, half 0.6 off in the 60s
+    assert report["expected_calibration_error"] == 0.4
+    assert report["buckets"] == [
+        {"min_confidence": 60, "max_confidence": 70, "count": 1, "mean_confidence": 60.0, "hit_rate": 0.0},
+        {"min_confidence": 80, "max_confidence": 90, "count": 1, "mean_confidence": 80.0, "hit_rate": 100.0},
+    ]
+
+
+def test_certain_predictions_have_finite_log_loss():
+    report = server.calibration_report(np.array([1.0, 0.0]), np.array([0.0, 1.0]), 10)
+    assert report["brier_score"] == 1.0
+    assert math.isfinite(report["log_loss"])
+
+
+def test_empty_sample():
+    report = server.calibration_report(np.array([]), np.array([]), 10)
+    assert report["settled"] == 0 and report["buckets"] == []
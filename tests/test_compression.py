@@ -0,0 +1,111 @@
+import asyncio
+import gzip
+
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    ("GZIP, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip; q=0.000, identity", None),
+    ("gzip;q=0.5", "gzip"),
+    ("deflate", None),
+    ("", None),
+])
+def test_choose_encoding_without_brotli(monkeypatch, accept_encoding, expected):
+    monkeypatch.setattr(server, "load_brotli", lambda: None)
+    assert server.choose_encoding(accept_encoding) == expected
+    assert server.choose_encoding(f"br, {accept_encoding}") == expected
+
+
+def test_choose_encoding_prefers_brotli(monkeypatch):
+    monkeypatch.setattr(server, "load_brotli", lambda: object())
+    assert server.choose_encoding("gzip, br") == "br"
+    assert server.choose_encoding("gzip, br;q=0") == "gzip"
+
+
+def serve(messages, accept_encoding="gzip", path="/api/analysis"):
+    """Run CompressionMiddleware over an app sending messages; returns what reached the client."""
+    sent = []
+
+    async def app(scope, receive, send):
+        for message in messages:
+            await send(message)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": path, "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(server.CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+    return sent
+
+
+def response(body: bytes, content_type="application/json", etag=None, **body_fields):
+    headers = [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+    if etag:
+        headers.append((b"etag", etag.encode()))
+    return [
+        {"type": "http.response.start", "status": 200, "headers": headers},
+        {"type": "http.response.body", "body": body, **body_fields},
+    ]
+
+
+def headers_of(message) -> dict:
+    return {name.decode(): value.decode() for name, value in message["headers"]}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    server.compressed_responses.clear()
+
+
+def test_small_bodies_are_not_compressed():
+    body = b'{"a": 1}' * 12
+    sent = serve(response(body))
+    assert "content-encoding" not in headers_of(sent[0])
+    assert sent[1]["body"] == body
+
+
+def test_bodies_at_the_threshold_are_compressed():
+    body = b"1" * 100
+    start, message = serve(response(body))
+    headers = headers_of(start)
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["content-length"] == str(len(message["body"]))
+    assert gzip.decompress(message["body"]) == body
+
+
+def test_uncompressible_types_and_identity_clients_pass_through():
+    body = b"\x89PNG" * 100
+    assert serve(response(body, content_type="image/png"))[1]["body"] == body
+    assert serve(response(b"{}" * 100), accept_encoding="identity")[1]["body"] == b"{}" * 100
+
+
+def test_streaming_responses_pass_through():
+    chunks = [
+        {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]},
+        {"type": "http.response.body", "body": b"event: ping\ndata: {}\n\n" * 10, "more_body": True},
+        {"type": "http.response.body", "body": b"event: ping\ndata: {}\n\n", "more_body": True},
+        {"type": "http.response.body", "body": b"", "more_body": False},
+    ]
+    sent = serve(chunks)
+    assert sent == chunks
+    assert "content-encoding" not in headers_of(sent[0])
+
+
+def test_strong_etag_becomes_weak_and_compressed_body_is_cached(monkeypatch):
+    body = b'{"items": []}' * 20
+    start, message = serve(response(body, etag='"analyses3"'))
+    assert headers_of(start)["etag"] == 'W/"analyses3"'
+    weak = serve(response(body, etag='W/"analyses3"'))
+    assert headers_of(weak[0])["etag"] == 'W/"analyses3"'
+
+    # An unchanged ETag is served from the cache without compressing again
+    monkeypatch.setattr(server, "compress_body", lambda body, encoding: pytest.fail("compressed twice"))
+    again = serve(response(body, etag='"analyses3"'))
+    assert again[1]["body"] == message["body"]
+    assert headers_of(again[0])["etag"] == 'W/"analyses3"'
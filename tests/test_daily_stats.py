@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import server
+
+from .conftest import GREEN, PENDING, RED, analysis_doc
+
+
+def test_lifecycle_deltas_sum_to_zero():
+    steps = [
+        (None, analysis_doc("a", PENDING)),
+        (analysis_doc("a", PENDING), analysis_doc("a", GREEN)),
+        (analysis_doc("a", GREEN), analysis_doc("a", RED)),
+        (analysis_doc("a", RED), analysis_doc("a", GREEN, odds="2,10", match_date=datetime(2026, 3, 15))),
+        (analysis_doc("a", GREEN, odds="2,10", match_date=datetime(2026, 3, 15)), None),
+    ]
+    total = {}
+    for old_doc, new_doc in steps:
+        server.merge_daily_stats_delta(total, server.daily_stats_delta(old_doc, new_doc))
+    assert set(total) == {"2026-03-14:over", "2026-03-15:over"}
+    for _, _, increments in total.values():
+        assert all(value == pytest.approx(0) for value in increments.values())
+
+
+def test_delta_of_a_settlement():
+    delta = server.daily_stats_delta(analysis_doc("a", PENDING), analysis_doc("a", GREEN, odds="2.5"))
+    day, bet_type, increments = delta["2026-03-14:over"]
+    assert (day, bet_type) == (datetime(2026, 3, 14), "over")
+    assert increments == {"settled": 1, GREEN: 1, "priced": 1, "odds_sum": 2.5, "profit": 1.5}
+    # Unpriced odds still count as settled
+    _, _, increments = server.daily_stats_delta(None, analysis_doc("b", RED, odds="n/a"))["2026-03-14:over"]
+    assert increments == {"settled": 1, RED: 1}
+    assert server.daily_stats_delta(analysis_doc("a", GREEN), analysis_doc("a", GREEN)) == {}
+
+
+def test_backfill_matches_incremental_rollups(mongo):
+    second_day = datetime(2026, 3, 15, 16)
+    steps = [
+        ("a", analysis_doc("a", PENDING)),
+        ("b", analysis_doc("b", GREEN, odds="2.00", bet_type="1")),
+        ("c", analysis_doc("c", RED, odds=None, match_date=second_day)),
+        ("a", analysis_doc("a", GREEN, odds="1.50")),
+        ("d", analysis_doc("d", GREEN, odds="3.10", match_date=second_day)),
+        ("b", analysis_doc("b", RED, odds="2.00", bet_type="1")),
+        ("d", None),
+        ("c", analysis_doc("c", GREEN, odds="1.95", match_date=second_day)),
+    ]
+
+    async def scenario():
+        for analysis_id, new_doc in steps:
+            old_doc = await mongo.analyses.find_one({"id": analysis_id}, {"_id": 0})
+            if new_doc is None:
+                await mongo.analyses.delete_one({"id": analysis_id})
+            else:
+                await mongo.analyses.replace_one({"id": analysis_id}, new_doc, upsert=True)
+            await server.apply_daily_stats_delta(server.daily_stats_delta(old_doc, new_doc))
+
+        async def snapshot():
+            return {
+                doc["_id"]: {field: doc.get(field, 0) for field in server.DAILY_STATS_FIELDS}
+                async for doc in mongo.daily_stats.find({"settled": {"$gt": 0}})
+            }
+
+        incremental = await snapshot()
+        assert await server.backfill_daily_stats() == {"analyses": 3, "documents": 3}
+        rebuilt = await snapshot()
+        assert set(rebuilt) == set(incremental) == {"2026-03-14:over", "2026-03-14:1", "2026-03-15:over"}
+        for key, counters in rebuilt.items():
+            assert counters == pytest.approx(incremental[key]), key
+
+    asyncio.run(scenario())
+
+
+def test_update_with_offset_match_date_keys_the_utc_day(mongo):
+    stored = analysis_doc("a", PENDING)
+    update = server.AnalysisUpdate.model_validate({"match_date": "2026-03-14T22:30:00-03:00", "result": GREEN})
+
+    async def scenario():
+        await mongo.analyses.insert_one(dict(stored))
+        await server.update_analysis("a", update, None)
+        rollups = [doc["_id"] async for doc in mongo.daily_stats.find({"settled": {"$gt": 0}})]
+        assert rollups == ["2026-03-15:over"]
+        await server.backfill_daily_stats()
+        assert [doc["_id"] async for doc in mongo.daily_stats.find({})] == ["2026-03-15:over"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+def drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def test_events_reach_subscribers_of_other_workers(mongo):
+    async def run():
+        publisher = server.EventBroker(10, 10, worker_id="worker-a")
+        relay = server.EventBroker(10, 10, worker_id="worker-b")
+        await publisher.relay_once()
+        await relay.relay_once()
+        local, remote = publisher.subscribe(), relay.subscribe()
+
+        await publisher.publish("analysis.created", {"id": "a1"})
+        await publisher.relay_once()
+        await relay.relay_once()
+
+        # Delivered once on each worker, with the same shared event id
+        assert drain(local) == [b'id: 1\nevent: analysis.created\ndata: {"id":"a1"}\n\n']
+        assert drain(remote) == [b'id: 1\nevent: analysis.created\ndata: {"id":"a1"}\n\n']
+        await relay.relay_once()
+        assert drain(remote) == []
+
+    asyncio.run(run())
+
+
+def test_relay_waits_for_a_missing_sequence_number(mongo, monkeypatch):
+    async def run():
+        relay = server.EventBroker(10, 10, worker_id="worker-b")
+        await relay.relay_once()
+        queue = relay.subscribe()
+        # Number 1 was taken by a publisher that has not written its event yet
+        await mongo.versions.update_one({"_id": server.STREAM_SEQUENCE_ID}, {"$set": {"v": 2}}, upsert=True)
+        await mongo.stream_events.insert_one(
+            {"_id": 2, "event": "valuable_tip.deleted", "data": {"id": "t1"}, "origin": "worker-a", "created_at": server.datetime.utcnow()}
+        )
+        await relay.relay_once()
+        assert drain(queue) == []
+
+        monkeypatch.setattr(server, "STREAM_GAP_TIMEOUT", 0)
+        await relay.relay_once()
+        assert len(drain(queue)) == 1
+        assert relay.counters["gaps_skipped"] == 1
+
+    asyncio.run(run())
+
+
+def test_stream_registers_only_while_it_is_sent(mongo):
+    async def run():
+        broker = server.EventBroker(1, 10)
+        original, server.event_broker = server.event_broker, broker
+        try:
+            stream = server.event_stream("user-1", server.time.time() + 60)
+            # Created but never iterated, like a response whose client left early
+            assert broker.stats()["subscribers"] == 0
+            assert (await stream.__anext__()).startswith(b"retry:")
+            assert broker.stats()["subscribers"] == 1
+            await stream.aclose()
+            assert broker.stats()["subscribers"] == 0
+        finally:
+            server.event_broker = original
+
+    asyncio.run(run())
+
+
+def test_stream_ends_when_the_session_expires(mongo):
+    async def run():
+        broker = server.EventBroker(1, 10)
+        original, server.event_broker = server.event_broker, broker
+        try:
+            messages = [message async for message in server.event_stream("user-1", server.time.time() - 1)]
+            assert len(messages) == 1 and messages[0].startswith(b"retry:")
+            assert broker.stats()["subscribers"] == 0
+        finally:
+            server.event_broker = original
+
+    asyncio.run(run())
+
+
+def test_stream_ticket_is_not_an_access_token():
+    ticket = server.create_stream_ticket("user-1", 2_000_000_000)
+    assert server.decode_token(ticket, "stream")["session_exp"] == 2_000_000_000
+    with pytest.raises(server.HTTPException):
+        server.decode_token(ticket)
+    access_token = server.create_access_token({"sub": "user-1"}, server.timedelta(minutes=5))
+    with pytest.raises(server.HTTPException):
+        server.decode_token(access_token, "stream")
+
+
+def test_stream_ends_when_the_user_is_gone(mongo, monkeypatch):
+    monkeypatch.setattr(server, "STREAM_HEARTBEAT_SECONDS", 0.01)
+
+    async def run():
+        # No such user in the database: the first heartbeat check closes the stream
+        messages = [message async for message in server.event_stream("deleted-user", server.time.time() + 60)]
+        assert len(messages) == 1
+
+    asyncio.run(run())
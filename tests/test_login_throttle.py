@@ -0,0 +1,93 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+import server
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(server.time, "monotonic", clock)
+    return clock
+
+
+def test_burst_then_retry_after(clock):
+    limiter = server.TokenBucketLimiter("test", rate=0.5, burst=3, max_keys=10)
+    assert [limiter._take_local("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Empty bucket: one token comes back after 1 / rate seconds
+    assert limiter._take_local("a") == pytest.approx(2.0)
+    clock.now += 0.5
+    assert limiter._take_local("a") == pytest.approx(1.5)
+
+
+def test_refill_is_capped_at_burst(clock):
+    limiter = server.TokenBucketLimiter("test", rate=1, burst=2, max_keys=10)
+    limiter._take_local("a")
+    limiter._take_local("a")
+    clock.now += 1
+    assert limiter._take_local("a") == 0.0
+    assert limiter._take_local("a") > 0
+    clock.now += 3600
+    assert [limiter._take_local("a") for _ in range(2)] == [0.0, 0.0]
+    assert limiter._take_local("a") > 0
+
+
+def test_keys_are_independent(clock):
+    limiter = server.TokenBucketLimiter("test", rate=0.1, burst=1, max_keys=10)
+    assert limiter._take_local("a") == 0.0
+    assert limiter._take_local("a") > 0
+    assert limiter._take_local("b") == 0.0
+
+
+def test_least_recently_used_bucket_is_evicted(clock):
+    limiter = server.TokenBucketLimiter("test", rate=0.1, burst=1, max_keys=2)
+    limiter._take_local("a")
+    limiter._take_local("b")
+    limiter._take_local("a")
+    limiter._take_local("c")
+    assert list(limiter._buckets) == ["a", "c"]
+    assert limiter.counters["evictions"] == 1
+    # An evicted key starts over with a full bucket
+    assert limiter._take_local("b") == 0.0
+
+
+def test_acquire_counts_throttled_attempts(clock):
+    limiter = server.TokenBucketLimiter("test", rate=0.1, burst=1, max_keys=10)
+    assert asyncio.run(limiter.acquire("a")) == 0.0
+    assert asyncio.run(limiter.acquire("a")) > 0
+    assert limiter.counters["allowed"] == 1
+    assert limiter.counters["throttled"] == 1
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_MONGO_URL"), reason="needs a real MongoDB in TEST_MONGO_URL")
+def test_shared_bucket_against_mongo():
+    # The shared bucket is a pipeline update using $$NOW, which only a real
+    # server evaluates
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def run():
+        client = AsyncIOMotorClient(os.environ["TEST_MONGO_URL"])
+        collection = client[f"throttle_test_{uuid.uuid4().hex[:8]}"].login_throttle
+        try:
+            limiter = server.TokenBucketLimiter("test", rate=0.1, burst=2, max_keys=10, shared=collection)
+            assert await limiter._take_shared("a") == 0.0
+            assert await limiter._take_shared("a") == 0.0
+            assert await limiter._take_shared("a") == pytest.approx(10, abs=0.5)
+            bucket = await collection.find_one({"_id": "test:a"})
+            assert bucket["expires_at"] > bucket["updated_at"]
+        finally:
+            await client.drop_database(collection.database.name)
+            client.close()
+
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+import asyncio
+
+import server
+
+
+def run_middleware(monkeypatch, content_type: str, duration: float) -> dict:
+    """Serve one response through MetricsMiddleware; returns what it tracked."""
+    monitor = server.LoopLagMonitor(0.5, 0.5, 1.0, 8)
+    gauge = server.Gauge("test_in_flight", "Requests in flight")
+    monkeypatch.setattr(server, "loop_monitor", monitor)
+    monkeypatch.setattr(server, "HTTP_REQUESTS_IN_FLIGHT", gauge)
+    clock = iter([100.0, 100.0 + duration])
+    monkeypatch.setattr(server.time, "perf_counter", lambda: next(clock))
+    observed = {"monitor": monitor}
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type.encode())]})
+        observed["active_during_body"] = len(monitor.active_requests)
+        observed["gauge_during_body"] = gauge._values.get((), 0)
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/api/stream"}
+    asyncio.run(server.MetricsMiddleware(app)(scope, None, send))
+    observed["gauge_after"] = gauge._values.get((), 0)
+    return observed
+
+
+def test_slow_json_request_is_recorded(monkeypatch):
+    observed = run_middleware(monkeypatch, "application/json", 5.0)
+    monitor = observed["monitor"]
+    assert observed["active_during_body"] == 1
+    assert observed["gauge_during_body"] == 1
+    assert observed["gauge_after"] == 0
+    assert [offender["kind"] for offender in monitor.offenders] == ["slow_request"]
+    assert not monitor.active_requests
+
+
+def test_event_stream_is_not_tracked(monkeypatch):
+    observed = run_middleware(monkeypatch, "text/event-stream; charset=utf-8", 3600.0)
+    monitor = observed["monitor"]
+    assert observed["active_during_body"] == 0
+    assert observed["gauge_during_body"] == 0
+    assert observed["gauge_after"] == 0
+    assert not monitor.offenders
+    assert not monitor.active_requests
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize("odds, expected", [
+    ("1.85", 1.85), ("1,85", 1.85), (" 2.10 ", 2.1), ("@1.85", 1.85), ("1.85 (Bet365)", 1.85),
+    ("Odd 2,10", 2.1), ("Bet365 @1,90", 1.9), ("2", 2.0), (1.75, 1.75),
+    (None, None), ("", None), ("a definir", None), ("1", None), ("0.95", None), ("nan", None),
+])
+def test_parse_odds(odds, expected):
+    assert server.parse_odds(odds) == expected
+
+
+@pytest.mark.parametrize("stake, expected", [
+    ("3%", (3.0, 3.0)), ("5-10% da banca", (5.0, 10.0)), ("2,5% a 5%", (2.5, 5.0)),
+    ("até 4%", (4.0, 4.0)), ("10 - 5 %", (5.0, 10.0)), ("1 unidade", (None, None)), (None, (None, None)),
+])
+def test_parse_stake_percent(stake, expected):
+    assert server.parse_stake_percent(stake) == expected
+
+
+@pytest.fixture
+def migration(mongo, monkeypatch):
+    state = {"done": False, "updated": {name: 0 for name, _, _, _ in server.NUMERIC_FIELD_MIGRATIONS}}
+    monkeypatch.setattr(server, "numeric_fields_migration", state)
+    monkeypatch.setattr(server, "MIGRATION_BATCH_SIZE", 2)
+    monkeypatch.setattr(server, "MIGRATION_BATCH_PAUSE", 0)
+    return state
+
+
+def test_migration_fills_legacy_documents(mongo, migration):
+    async def scenario():
+        await mongo.analyses.insert_many([
+            {"id": "a", "odds": "@1.85"},
+            {"id": "b", "odds": None},
+            # Migrated by the old parser, which rejected this value
+            {"id": "c", "odds": "Odd 2,10", "odds_value": None},
+            {"id": "d", "odds": "3.00", "odds_value": 3.0},
+        ])
+        await mongo.valuable_tips.insert_one({"id": "t", "total_odds": "4,50", "stake_suggestion": "2-3% da banca"})
+
+        state = await server.migrate_numeric_fields()
+        assert state["done"]
+        values = {doc["id"]: doc["odds_value"] async for doc in mongo.analyses.find({})}
+        assert values == {"a": 1.85, "b": None, "c": 2.1, "d": 3.0}
+        tip = await mongo.valuable_tips.find_one({"id": "t"})
+        assert (tip["total_odds_value"], tip["stake_min_percent"], tip["stake_max_percent"]) == (4.5, 2.0, 3.0)
+
+    asyncio.run(scenario())
+
+
+def test_migration_resumes_after_time_budget(mongo, migration, monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr(server.time, "monotonic", lambda: clock["now"])
+    bulk_write = type(mongo.analyses).bulk_write
+
+    async def slow_bulk_write(self, operations, **kwargs):
+        clock["now"] += 1
+        return await bulk_write(self, operations, **kwargs)
+
+    monkeypatch.setattr(type(mongo.analyses), "bulk_write", slow_bulk_write)
+
+    async def scenario():
+        await mongo.analyses.insert_many([{"id": str(i), "odds": f"1.{i}5"} for i in range(5)])
+        # One batch of two per second of budget
+        assert not (await server.migrate_numeric_fields(time_budget=1))["done"]
+        assert await mongo.analyses.count_documents({"odds_value": {"$exists": True}}) == 2
+        assert not (await server.migrate_numeric_fields(time_budget=1))["done"]
+        assert await mongo.analyses.count_documents({"odds_value": {"$exists": True}}) == 4
+        assert (await server.migrate_numeric_fields(time_budget=10))["done"]
+        assert await mongo.analyses.count_documents({"odds_value": 1.45}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_migration_never_overwrites_a_concurrent_edit(mongo, migration, monkeypatch):
+    bulk_write = type(mongo.analyses).bulk_write
+
+    async def racing_bulk_write(self, operations, **kwargs):
+        # The update route rewrites "a" between the migration's read and write
+        if self.name == "analyses":
+            await self.update_one({"id": "a"}, {"$set": {"odds": "2.40", "odds_value": 2.4}})
+        return await bulk_write(self, operations, **kwargs)
+
+    monkeypatch.setattr(type(mongo.analyses), "bulk_write", racing_bulk_write)
+
+    async def scenario():
+        await mongo.analyses.insert_many([{"id": "a", "odds": "1.50"}, {"id": "b", "odds": "1.70"}])
+        await server.migrate_numeric_fields()
+        values = {doc["id"]: doc["odds_value"] async for doc in mongo.analyses.find({})}
+        assert values == {"a": 2.4, "b": 1.7}
+        assert migration["updated"]["analyses"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,57 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_cursor_round_trip():
+    doc = {"created_at": datetime(2026, 5, 1, 12, 30, 15, 123456), "id": "b6f1"}
+    cursor = server.encode_cursor(doc)
+    assert "=" not in cursor
+    assert server.decode_cursor(cursor) == {"$or": [
+        {"created_at": {"$lt": doc["created_at"]}},
+        {"created_at": doc["created_at"], "id": {"$lt": "b6f1"}},
+    ]}
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(b'{"i": "x"}').decode(),
+    base64.urlsafe_b64encode(b'{"c": "yesterday", "i": "x"}').decode(),
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as raised:
+        server.decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def test_offset_cursor_round_trip_and_invalid_input():
+    assert server.decode_offset_cursor(server.encode_offset_cursor(150)) == 150
+    for cursor in (server.encode_offset_cursor(-1), "%%%", base64.urlsafe_b64encode(b'{"o": "x"}').decode()):
+        with pytest.raises(HTTPException):
+            server.decode_offset_cursor(cursor)
+
+
+def test_pages_cover_ties_exactly_once(mongo):
+    created_at = datetime(2026, 5, 1)
+    # Several documents share created_at, so the id tiebreaker decides the order
+    docs = [{"id": f"{i:02d}", "created_at": created_at - timedelta(seconds=i // 3)} for i in range(10)]
+
+    async def scenario():
+        await mongo.items.insert_many([dict(doc) for doc in docs])
+        seen, cursor = [], None
+        while True:
+            page, cursor = await server.fetch_page(mongo.items, {}, 4, cursor, {"_id": 0})
+            seen.extend(doc["id"] for doc in page)
+            if cursor is None:
+                break
+        expected = sorted(docs, key=lambda doc: (doc["created_at"], doc["id"]), reverse=True)
+        assert seen == [doc["id"] for doc in expected]
+
+    asyncio.run(scenario())
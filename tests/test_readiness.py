@@ -0,0 +1,34 @@
+import asyncio
+
+import server
+
+
+def test_warm_up_stays_unready_until_it_succeeds(mongo, monkeypatch):
+    probe = server.ReadinessProbe(0, 1)
+    monkeypatch.setattr(server, "readiness", probe)
+    monkeypatch.setattr(server, "MONGO_WARMUP_CONNECTIONS", 0)
+    monkeypatch.setattr(server, "WARMUP_RETRY_SECONDS", 0.01)
+    attempts = []
+    build = server.build_public_valuable_tips
+
+    async def flaky_build():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise RuntimeError("primary unavailable")
+        return await build()
+
+    monkeypatch.setattr(server, "build_public_valuable_tips", flaky_build)
+
+    async def scenario():
+        warming = asyncio.create_task(server.warm_up())
+        while not attempts:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert not probe.warmed_up
+        assert probe.warm_up_error == "primary unavailable"
+
+        await asyncio.wait_for(warming, 1)
+        assert len(attempts) == 2
+        assert probe.warmed_up and probe.warm_up_error is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime
+
+from starlette.requests import Request
+
+import server
+
+
+def make_request(path: str, query: str = "", if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path,
+                    "query_string": query.encode(), "headers": headers})
+
+
+def test_variant_changes_etag():
+    request = make_request("/api/stats/timeseries")
+    versions = {"analyses": 3}
+    assert server.make_etag(request, versions) == '"analyses3"'
+    assert server.make_etag(request, versions, "day.2026-01-01.2026-01-30") != server.make_etag(request, versions)
+    assert (server.make_etag(request, versions, "day.2026-01-01.2026-01-30")
+            != server.make_etag(request, versions, "day.2026-01-02.2026-01-31"))
+
+
+def test_timeseries_default_window_follows_the_clock(mongo, monkeypatch):
+    today = {"now": datetime(2026, 1, 30, 12)}
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return today["now"]
+
+    monkeypatch.setattr(server, "datetime", FrozenDatetime)
+    user = server.User(username="user", email="user@example.com", password_hash="x")
+
+    async def fetch(if_none_match=None):
+        request = make_request("/api/stats/timeseries", if_none_match=if_none_match)
+        return await server.get_statistics_timeseries(request, server.TimeseriesGranularity.DAY, None, None, None, user)
+
+    async def scenario():
+        first = await fetch()
+        assert b'"end":"2026-01-30"' in first.body
+        assert (await fetch(first.headers["etag"])).status_code == 304
+
+        today["now"] = datetime(2026, 1, 31, 0, 5)
+        second = await fetch(first.headers["etag"])
+        assert second.status_code == 200
+        assert b'"end":"2026-01-31"' in second.body
+        assert second.headers["etag"] != first.headers["etag"]
+
+    asyncio.run(scenario())
+
+
+def test_stats_response_keeps_etag(mongo):
+    user = server.User(username="user", email="user@example.com", password_hash="x")
+
+    async def scenario():
+        await mongo.analyses.insert_many([{"id": "a", "result": "green"}, {"id": "b", "result": "red"}])
+        await server.reconcile_analysis_stats()
+        response = await server.get_statistics(make_request("/api/stats"), server.Response(), user)
+        assert isinstance(response, server.FastJSONResponse)
+        assert response.body == b'{"total_analyses":2,"green":1,"red":1,"pending":0,"accuracy":50.0}'
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        again = await server.get_statistics(make_request("/api/stats", if_none_match=etag), server.Response(), user)
+        assert again.status_code == 304
+
+    asyncio.run(scenario())
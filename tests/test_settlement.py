@@ -0,0 +1,60 @@
+import asyncio
+
+import server
+
+from .conftest import GREEN, PENDING, RED, analysis_doc
+
+
+def analysis(analysis_id: str, result: str) -> dict:
+    return analysis_doc(analysis_id, result, odds="2.00")
+
+
+def settle(*items):
+    return [server.AnalysisSettlement(id=analysis_id, result=result) for analysis_id, result in items]
+
+
+def test_concurrent_settlement_is_reported_as_conflict(mongo, monkeypatch):
+    collection_class = type(mongo.analyses)
+    original_bulk_write = collection_class.bulk_write
+
+    async def racing_bulk_write(self, operations, **kwargs):
+        # Another admin settles "b" between our read and our write
+        if self.name == "analyses":
+            await self.update_one({"id": "b"}, {"$set": {"result": RED}})
+            await server.increment_analysis_stats(server.analysis_stats_delta(PENDING, RED))
+            await server.apply_daily_stats_delta(server.daily_stats_delta(analysis("b", PENDING), analysis("b", RED)))
+        return await original_bulk_write(self, operations, **kwargs)
+
+    async def scenario():
+        await mongo.analyses.insert_many([analysis("a", PENDING), analysis("b", PENDING), analysis("c", GREEN)])
+        await server.reconcile_analysis_stats()
+        monkeypatch.setattr(collection_class, "bulk_write", racing_bulk_write)
+
+        report = await server.settle_analyses(settle(("a", GREEN), ("b", GREEN), ("c", GREEN), ("z", RED)), None)
+
+        monkeypatch.setattr(collection_class, "bulk_write", original_bulk_write)
+        statuses = {item["id"]: item["status"] for item in report["results"]}
+        assert statuses == {"a": "updated", "b": "conflict", "c": "unchanged", "z": "not_found"}
+        assert report["summary"] == {"updated": 1, "conflict": 1, "unchanged": 1, "not_found": 1}
+        assert (await mongo.analyses.find_one({"id": "b"}))["result"] == RED
+
+        # The conflict path recounts, so the counters and rollups hold the
+        # other admin's result for "b" rather than ours
+        assert (await server.reconcile_analysis_stats())["drift"] == {}
+        rollup = await mongo.daily_stats.find_one({"_id": "2026-03-14:over"})
+        assert (rollup["settled"], rollup[GREEN], rollup[RED]) == (3, 2, 1)
+
+    asyncio.run(scenario())
+
+
+def test_settlement_without_conflict_applies_deltas(mongo):
+    async def scenario():
+        await mongo.analyses.insert_many([analysis("a", PENDING), analysis("b", PENDING)])
+        await server.reconcile_analysis_stats()
+        report = await server.settle_analyses(settle(("a", GREEN), ("b", RED)), None)
+        assert report["summary"] == {"updated": 2}
+        assert (await server.reconcile_analysis_stats())["drift"] == {}
+        rollup = await mongo.daily_stats.find_one({"_id": "2026-03-14:over"})
+        assert (rollup["settled"], rollup[GREEN], rollup[RED], rollup.get("profit", 0)) == (2, 1, 1, 0)
+
+    asyncio.run(scenario())
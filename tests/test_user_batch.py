@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def batch(**fields) -> server.UserBatch:
+    return server.UserBatch.model_validate(fields)
+
+
+def rejected(user_batch: server.UserBatch) -> str:
+    with pytest.raises(HTTPException) as raised:
+        server.user_batch_query(user_batch)
+    assert raised.value.status_code == 400
+    return raised.value.detail
+
+
+def test_ids_or_filter_but_not_both():
+    assert rejected(batch()) == "Informe ids ou filter"
+    assert rejected(batch(ids=["a"], filter={"is_active": True})) == "Informe ids ou filter"
+
+
+def test_id_count_is_bounded(monkeypatch):
+    monkeypatch.setattr(server, "MAX_USER_BATCH", 3)
+    assert rejected(batch(ids=[])) == "Informe de 1 a 3 ids"
+    assert rejected(batch(ids=["a", "b", "c", "d"])) == "Informe de 1 a 3 ids"
+    assert server.user_batch_query(batch(ids=["a", "b"])) == {"id": {"$in": ["a", "b"]}}
+
+
+def test_empty_filter_is_rejected():
+    assert rejected(batch(filter={})) == "Filtro vazio"
+    assert rejected(batch(filter={"is_active": None})) == "Filtro vazio"
+
+
+def test_filters_only_select_regular_users():
+    query = server.user_batch_query(batch(filter={
+        "approved_by_admin": False, "created_after": "2026-01-01T00:00:00", "created_before": "2026-02-01T00:00:00",
+    }))
+    assert query == {
+        "role": "user",
+        "approved_by_admin": False,
+        "created_at": {"$gte": datetime(2026, 1, 1), "$lt": datetime(2026, 2, 1)},
+    }
+
+
+@pytest.fixture
+def accounts(mongo):
+    admin = server.User(username="admin", email="admin@example.com", password_hash="x", role="admin", approved_by_admin=True)
+    other_admin = server.User(username="root", email="root@example.com", password_hash="x", role="admin", approved_by_admin=True)
+    users = [server.User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x", approved_by_admin=i < 2) for i in range(4)]
+
+    async def insert():
+        await mongo.users.insert_many([user.dict() for user in (admin, other_admin, *users)])
+
+    asyncio.run(insert())
+    return admin, other_admin, users
+
+
+def test_filter_actions_never_touch_admins(mongo, accounts):
+    admin, other_admin, users = accounts
+
+    async def scenario():
+        report = await server.deactivate_users(batch(filter={"is_active": True}), admin)
+        assert report == {"matched": 4, "modified": 4}
+        assert await mongo.users.count_documents({"role": "admin", "is_active": True}) == 2
+
+        report = await server.delete_users(batch(filter={"approved_by_admin": False}), admin)
+        assert report == {"deleted": 2}
+        assert {doc["username"] async for doc in mongo.users.find({})} == {"admin", "root", "u0", "u1"}
+
+    asyncio.run(scenario())
+
+
+def test_admin_cannot_delete_itself(mongo, accounts):
+    admin, other_admin, users = accounts
+
+    async def scenario():
+        with pytest.raises(HTTPException) as raised:
+            await server.delete_users(batch(ids=[users[0].id, admin.id]), admin)
+        assert raised.value.status_code == 400
+        assert await mongo.users.count_documents({}) == 6
+
+        # Explicit ids are matched as given, other admins included
+        assert await server.delete_users(batch(ids=[users[0].id, other_admin.id]), admin) == {"deleted": 2}
+        assert await mongo.users.find_one({"id": admin.id}) is not None
+
+    asyncio.run(scenario())
+
+
+def test_batch_approval_invalidates_cached_users(mongo, accounts):
+    admin, other_admin, users = accounts
+
+    async def scenario():
+        pending = users[3]
+        server.user_cache.set(pending.id, (pending, 0))
+        report = await server.approve_users(batch(ids=[pending.id, "missing"]), admin)
+        assert report == {"matched": 1, "modified": 1}
+        assert server.user_cache.get(pending.id) is None
+        assert (await mongo.versions.find_one({"_id": server.USERS_VERSION_ID}))["v"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_delete_on_another_worker_reaches_cached_user(mongo, monkeypatch):
+    monkeypatch.setattr(server, "USER_VERSION_CHECK_SECONDS", 0)
+    user = server.User(username="ana", email="ana@example.com", password_hash="x")
+
+    async def scenario():
+        await mongo.users.insert_one(user.dict())
+        assert (await server.load_token_user(user.id)).id == user.id
+        assert server.user_cache.get(user.id) is not None
+
+        # Another worker deletes the user: its cache call bumps the shared
+        # version but cannot touch this worker's entry
+        await mongo.users.delete_one({"id": user.id})
+        await mongo.versions.update_one({"_id": server.USERS_VERSION_ID}, {"$inc": {"v": 1}}, upsert=True)
+
+        with pytest.raises(HTTPException) as raised:
+            await server.load_token_user(user.id)
+        assert raised.value.status_code == 401
+
+    asyncio.run(scenario())
+
+
+def test_version_is_reread_at_most_every_check_interval(mongo, monkeypatch):
+    monkeypatch.setattr(server, "USER_VERSION_CHECK_SECONDS", 60)
+    user = server.User(username="bia", email="bia@example.com", password_hash="x")
+
+    async def scenario():
+        await mongo.users.insert_one(user.dict())
+        await server.load_token_user(user.id)
+        await mongo.versions.update_one({"_id": server.USERS_VERSION_ID}, {"$inc": {"v": 1}}, upsert=True)
+        # Within the interval the cached entry is still served
+        assert (await server.load_token_user(user.id)).id == user.id
+        assert server.users_version["value"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_bumps_shared_version(mongo):
+    async def scenario():
+        server.user_cache.set("u1", ("cached", 0))
+        await server.invalidate_cached_users(["u1"])
+        assert server.user_cache.get("u1") is None
+        assert (await mongo.versions.find_one({"_id": server.USERS_VERSION_ID}))["v"] == 1
+
+    asyncio.run(scenario())